@@ -4,32 +4,107 @@ RuundPDF v3.0.0 - PDF Reader с РАБОЧИМ управлением озвуч
 Author: DeeR Tuund (c) 2025
 """
 
+import time
+_STARTUP_TIME = time.perf_counter()  # Для отчета --startup-timing
+
 import sys
+if __name__ == '__main__' and getattr(sys, 'frozen', False):
+    # Рабочие процессы собранного exe запускаются этим же exe:
+    # отдаем их multiprocessing до импорта Qt
+    import multiprocessing
+    multiprocessing.freeze_support()
+
 import fitz
 import os
 import threading
-import pyttsx3
-import time
+import queue
+import bisect
+import functools
+import hashlib
+import re
+import unicodedata
+from array import array
+from collections import OrderedDict
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QPushButton, QFileDialog,
     QLabel, QHBoxLayout, QSlider, QGraphicsScene, QGraphicsView, QGraphicsPixmapItem,
     QDialog, QTextEdit, QMessageBox, QToolBar, QFrame, QMenu,
     QGroupBox, QRadioButton, QLineEdit, QCheckBox, QInputDialog, QListWidget,
-    QProgressBar, QGraphicsRectItem, QTextBrowser
+    QProgressBar, QGraphicsItem, QTextBrowser, QTreeView, QTabBar
 )
 from PyQt6.QtGui import (
     QPixmap, QImage, QIcon, QAction, QPainter, QPageLayout, QPageSize,
     QDropEvent, QDragEnterEvent, QFont, QBrush, QColor, QCursor, QTransform, QPen
 )
-from PyQt6.QtCore import Qt, QSize, QFileInfo, QSettings, QTimer, QRectF, QPointF, QRect, pyqtSignal, QObject, QUrl
-from PyQt6.QtPrintSupport import QPrintDialog
+from PyQt6.QtCore import Qt, QSize, QFileInfo, QSettings, QTimer, QRectF, QPointF, QRect, pyqtSignal, QObject, QUrl, QStandardPaths, QAbstractListModel, QModelIndex
 from PyQt6.QtGui import QDesktopServices
-from langdetect import detect, DetectorFactory
-DetectorFactory.seed = 0  # Для воспроизводимости результатов
+from ruundpdf_workers import (
+    RenderProcessPool, SharedProcessPool, page_text_spans, page_links, search_pages_in_process,
+    repair_pdf_in_process, light_spawn, spawn_lock
+)
+# pyttsx3, langdetect, QtPrintSupport, а также модули поиска, экспорта и
+# восстановления файлов (sqlite3, wave, subprocess, concurrent.futures,
+# QtNetwork...) импортируются при первом использовании: до показа первой
+# страницы загружаются только Qt и PyMuPDF
 
 # ============================================================================
 # ВСПОМОГАТЕЛЬНЫЕ ФУНКЦИИ
 # ============================================================================
+class StartupTiming:
+    """Замеры времени запуска; отчет сохраняется с флагом --startup-timing.
+
+    К тому же отчету при выходе дописывается статистика кэшей за сеанс.
+    """
+    def __init__(self):
+        self.enabled = False
+        self.marks = []
+        self.reported = False
+    
+    def mark(self, name):
+        if not self.reported:
+            self.marks.append((name, time.perf_counter() - _STARTUP_TIME))
+    
+    def report(self, status_bar=None):
+        """Сохраняет отчет один раз - когда показана первая страница.
+        
+        Собранный exe работает без консоли, поэтому отчет пишется в файл
+        в каталоге настроек, а итог показывается в строке состояния.
+        """
+        if self.reported:
+            return
+        self.reported = True
+        if not self.enabled:
+            return
+        lines = ["Время запуска:"]
+        lines += [f"  {seconds * 1000:8.1f} мс  {name}" for name, seconds in self.marks]
+        path = self._write(lines, 'w')
+        if status_bar is not None and self.marks:
+            message = f"Запуск: {self.marks[-1][1] * 1000:.0f} мс"
+            status_bar.showMessage(message + (f", отчет: {path}" if path else ""))
+    
+    def append(self, lines):
+        """Дописывает строки в уже сохраненный отчет (только с флагом --startup-timing)"""
+        if self.enabled and self.reported:
+            self._write(lines, 'a')
+    
+    @staticmethod
+    def _write(lines, mode):
+        """Печатает строки и пишет их в файл отчета; возвращает путь или None"""
+        print("\n".join(lines))
+        base = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.GenericConfigLocation)
+        path = os.path.join(base, "DeeRTuund", "RuundPDF", "startup-timing.txt")
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, mode, encoding='utf-8') as f:
+                f.write("\n".join(lines) + "\n")
+        except OSError as e:
+            print(f"Не удалось сохранить отчет о запуске: {e}")
+            return None
+        return path
+
+startup_timing = StartupTiming()
+startup_timing.mark("импорт модулей")
+
 def resource_path(relative_path):
     try:
         base_path = sys._MEIPASS
@@ -47,9 +122,260 @@ def create_text_icon(text, size=32):
     painter.end()
     return QIcon(pixmap)
 
+def image_from_samples(width, height, stride, samples):
+    """QImage из RGB-байтов процесса рендеринга (безопасно для рабочего потока)"""
+    qimage = QImage(samples, width, height, stride, QImage.Format.Format_RGB888)
+    # Копируем буфер: QImage не владеет байтами samples
+    return qimage.copy()
+
 # ============================================================================
 # КЛАСС ДЛЯ УПРАВЛЕНИЯ ОЗВУЧКОЙ (ВОССТАНОВЛЕННЫЙ РАБОЧИЙ ВАРИАНТ)
 # ============================================================================
+SENTENCE_END = re.compile(r'(?<=[.!?…])\s+(?=["«„(\[]?[A-ZА-ЯЁ0-9])')
+
+def split_sentences(text, max_length=300):
+    """Делит текст на предложения для озвучки по частям.
+
+    Слишком длинные предложения режутся по знакам препинания или
+    пробелам, чтобы пауза и остановка срабатывали быстро.
+    """
+    sentences = []
+    for sentence in SENTENCE_END.split(text):
+        sentence = sentence.strip()
+        while len(sentence) > max_length:
+            cut = max(sentence.rfind(mark, 0, max_length) for mark in (', ', '; ', ': '))
+            if cut <= 0:
+                cut = sentence.rfind(' ', 0, max_length)
+            if cut <= 0:
+                cut = max_length - 1
+            sentences.append(sentence[:cut + 1].strip())
+            sentence = sentence[cut + 1:].strip()
+        if sentence:
+            sentences.append(sentence)
+    return sentences
+
+LANGUAGE_TAG = re.compile(r"\[lang (\w+)\]")
+
+def tidy_tts_text(text):
+    """Склеивает переносы слов и схлопывает пробелы и переводы строк
+    внутри абзаца - они мешают интонации"""
+    text = re.sub(r"(\w)-\n(\w)", r"\1\2", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+def clean_tts_text(text):
+    """Готовит текст к озвучке: [(текст, язык или None)] по фрагментам.
+
+    text_provider может ставить метки языка "[lang xx]" перед абзацами;
+    текст до первой метки получает язык None.
+    """
+    parts = LANGUAGE_TAG.split(text or "")
+    # split с группой: [текст, язык, текст, язык, текст, ...]
+    segments = []
+    for language, chunk in zip([None] + parts[1::2], parts[0::2]):
+        chunk = tidy_tts_text(chunk)
+        if chunk:
+            segments.append((chunk, language))
+    return segments
+
+class LanguageDetector:
+    """Определение языка текста для озвучки.
+
+    Сначала дешевая проверка по алфавиту (кириллица - 'ru', латиница с
+    частыми английскими словами - 'en'); langdetect с его профилями и
+    n-граммами вызывается только для неоднозначного текста. Результаты по
+    страницам кэшируются, язык определяется по абзацам (блокам страницы),
+    поэтому страницы со смешанными языками читаются нужными голосами.
+    """
+    
+    ENGLISH_WORDS = frozenset(
+        "the and of to in is that for it with as was on are be this by at from or an not have".split()
+    )
+    MIN_DETECT_LENGTH = 20
+    # Более короткие неоднозначные абзацы (строки, подписи) получают язык
+    # страницы - иначе langdetect вызывался бы на каждую строку
+    PARAGRAPH_DETECT_LENGTH = 150
+    
+    def __init__(self, cache_size=256):
+        self.cache = OrderedDict()  # (файл, страница) -> [(абзац, язык)]
+        self.cache_size = cache_size
+        self.lock = threading.Lock()
+        self._langdetect = None  # langdetect.detect после первой загрузки профилей
+    
+    def script_language(self, text):
+        """Язык по алфавиту или None, если текст неоднозначен"""
+        sample = text[:1000]
+        cyrillic = latin = 0
+        for c in sample.lower():
+            if 'а' <= c <= 'я' or c == 'ё':
+                cyrillic += 1
+            elif 'a' <= c <= 'z':
+                latin += 1
+            elif c in 'іїєґў':
+                return None  # Другой кириллический язык - решит langdetect
+        letters = cyrillic + latin
+        if not letters:
+            return None
+        if cyrillic >= 0.8 * letters:
+            return 'ru'
+        if latin >= 0.8 * letters:
+            words = re.findall(r"[a-z]+", sample.lower())
+            common = sum(1 for word in words if word in self.ENGLISH_WORDS)
+            if common >= max(1, 0.05 * len(words)):
+                return 'en'
+        return None
+    
+    def detect(self, text, default=None):
+        language = self.script_language(text)
+        if language is not None:
+            return language
+        if len(text.strip()) < self.MIN_DETECT_LENGTH:
+            return default
+        try:
+            return self.langdetect()(text[:1000])
+        except Exception:
+            return default
+    
+    def langdetect(self):
+        """langdetect.detect; импорт и загрузка профилей - один раз под
+        блокировкой (detect зовут и поток озвучки, и поток подготовки)"""
+        with self.lock:
+            if self._langdetect is None:
+                from langdetect import detect, DetectorFactory
+                from langdetect.detector_factory import init_factory
+                DetectorFactory.seed = 0  # Для воспроизводимости результатов
+                init_factory()
+                self._langdetect = detect
+            return self._langdetect
+    
+    def page_paragraphs(self, page, key=None):
+        """Абзацы страницы с языком каждого: [(текст, язык или None)]"""
+        if key is not None:
+            with self.lock:
+                if key in self.cache:
+                    self.cache.move_to_end(key)
+                    return self.cache[key]
+        
+        texts = [block[4] for block in page.get_text("blocks") if block[6] == 0 and block[4].strip()]
+        page_language = None  # Определяется лениво, не больше одного раза
+        paragraphs = []
+        for text in texts:
+            language = self.script_language(text)
+            if language is None and len(text) >= self.PARAGRAPH_DETECT_LENGTH:
+                language = self.detect(text)
+            if language is None:
+                if page_language is None:
+                    page_language = self.detect(" ".join(texts)) or ""
+                language = page_language or None
+            paragraphs.append((text, language))
+        
+        if key is not None:
+            with self.lock:
+                self.cache[key] = paragraphs
+                if len(self.cache) > self.cache_size:
+                    self.cache.popitem(last=False)
+        return paragraphs
+
+language_detector = LanguageDetector()
+
+def find_voice_id(tts_engine, language, use_female):
+    """НАДЕЖНЫЙ выбор голоса с понятной логикой и отладкой"""
+    print(f"РЕЖИМ: текст={language}, пол={'женский' if use_female else 'мужской'}")
+
+    # 2. Получаем ВСЕ голоса и логируем их
+    voices = tts_engine.getProperty('voices')
+    print(f"Всего голосов в системе: {len(voices)}")
+    for i, v in enumerate(voices):
+        print(f"  {i+1:2d}. {v.name}")
+        print(f"      ID: {v.id[:60]}...")
+
+    # 3. ИДЕАЛЬНЫЙ ВЫБОР: ищем голос, который ТОЧНО подходит
+    selected_voice = None
+
+    if language == 'ru' and use_female:
+        print("\n→ Ищу русский женский голос (Ирина)...")
+        # Ищем Ирину
+        for v in voices:
+            v_lower = v.name.lower()
+            v_id_upper = v.id.upper()
+            # Русская Ирина имеет в ID 'TTS_MS_RU-RU_IRINA'
+            if ('irina' in v_lower or 'ирина' in v_lower or 
+                'TTS_MS_RU-RU_IRINA' in v_id_upper):
+                selected_voice = v
+                print(f"   ✓ Найдена Ирина: {v.name}")
+                break
+
+    elif language == 'ru' and not use_female:
+        print("\n→ Ищу русский мужской голос (Павел/Максим)...")
+        # Сначала ищем Павел
+        for v in voices:
+            v_lower = v.name.lower()
+            v_id_upper = v.id.upper()
+            if ('pavel' in v_lower or 'павел' in v_lower or 
+                'TTS_MS_RU-RU_PAVEL' in v_id_upper):
+                selected_voice = v
+                print(f"   ✓ Найден Павел: {v.name}")
+                break
+
+        # Если Павел не найден, ищем Максим
+        if not selected_voice:
+            for v in voices:
+                v_lower = v.name.lower()
+                if ('maxim' in v_lower or 'максим' in v_lower):
+                    selected_voice = v
+                    print(f"   ✓ Найден Максим: {v.name}")
+                    break
+
+        # КРИТИЧНО: Если русского мужского нет - используем русский женский
+        if not selected_voice:
+            print("   ⚠️ Русский мужской голос не найден!")
+            print("   🔄 Использую русский женский голос (Ирина) как запасной вариант")
+            # Ищем Ирину как запасной вариант
+            for v in voices:
+                v_lower = v.name.lower()
+                if 'irina' in v_lower or 'ирина' in v_lower:
+                    selected_voice = v
+                    print(f"   → Запасной: {v.name}")
+                    break
+
+    elif language == 'en' and use_female:
+        print("\n→ Ищу английский женский голос (Зира)...")
+        # Ищем Зиру
+        for v in voices:
+            v_lower = v.name.lower()
+            v_id_upper = v.id.upper()
+            if ('zira' in v_lower or 'TTS_MS_EN-US_ZIRA' in v_id_upper):
+                selected_voice = v
+                print(f"   ✓ Найдена Зира: {v.name}")
+                break
+
+    elif language == 'en' and not use_female:
+        print("\n→ Ищу английский мужской голос (Дэвид)...")
+        # Ищем Дэвида
+        for v in voices:
+            v_lower = v.name.lower()
+            v_id_upper = v.id.upper()
+            if ('david' in v_lower or 'TTS_MS_EN-US_DAVID' in v_id_upper):
+                selected_voice = v
+                print(f"   ✓ Найден Дэвид: {v.name}")
+                break
+
+    # 4. Возвращаем выбранный голос
+    if selected_voice:
+        print(f"\n✅ ВЫБРАН ГОЛОС: {selected_voice.name}")
+        print("=" * 60)
+        return selected_voice.id
+
+    print("\n⚠️ Подходящий голос не найден!")
+    # Используем первый доступный голос
+    if voices:
+        print(f"   Использую: {voices[0].name}")
+        print("=" * 60)
+        return voices[0].id
+
+    print("   ❌ Нет доступных голосов!")
+    print("=" * 60)
+    return None
+
 class TTSController(QObject):
     """Контроллер для управления озвучкой - ПРОСТОЙ И РАБОЧИЙ"""
     progress = pyqtSignal(int)      # Текущая страница
@@ -68,7 +394,6 @@ class TTSController(QObject):
         # Состояние плеера
         self.is_running = False
         self.is_paused = False
-        self.should_stop = False
         
         # Текущее состояние чтения
         self.current_page = 0           # Страница, которую сейчас читаем
@@ -77,6 +402,8 @@ class TTSController(QObject):
         
         # Для сохранения позиции при паузе
         self.paused_at_page = None     # На какой странице была пауза
+        self.current_chunk = 0         # Предложение страницы, которое сейчас читаем
+        self.word_position = 0         # Смещение текущего слова в предложении (с него продолжаем)
         
         # Чтение в цикле
         self.loop_reading = False
@@ -85,7 +412,20 @@ class TTSController(QObject):
         self.tts_engine = None
         self.tts_thread = None
         
-        # Для контроля потока чтения
+        # Конвейер текста: фоновый поток готовит следующие страницы заранее
+        settings = QSettings("DeeRTuund", "RuundPDF")
+        self.lookahead = max(1, settings.value("tts_lookahead_pages", 3, type=int))
+        self.page_queue = None
+        self.producer_thread = None
+        self.page_cache = OrderedDict()  # страница -> (текст, язык)
+        self.page_cache_size = 16
+        
+        # Голос: один движок на сеанс чтения, ID голоса по (язык, женский)
+        self.voice_ids = {}
+        self.applied_voice = None  # (язык, женский), выставленные в движке
+        self.load_voice_settings()
+        
+        # Для контроля потока чтения; stop_event - свой у каждого сеанса
         self.pause_event = threading.Event()
         self.resume_event = threading.Event()
         self.stop_event = threading.Event()
@@ -110,16 +450,17 @@ class TTSController(QObject):
         
         self.is_running = True
         self.is_paused = False
-        self.should_stop = False
         self.current_page = self.read_from_page
+        self.load_voice_settings()
         
-        # Сбрасываем флаги
+        # Сбрасываем флаги. Событие остановки - новое: потоки прошлого
+        # сеанса, не успевшие завершиться, видят свое, уже выставленное
         self.pause_event.clear()
         self.resume_event.clear()
-        self.stop_event.clear()
+        self.stop_event = threading.Event()
         
         # Запускаем поток чтения
-        self.tts_thread = threading.Thread(target=self._read_document)
+        self.tts_thread = threading.Thread(target=self._read_document, args=(self.stop_event,))
         self.tts_thread.daemon = True
         self.tts_thread.start()
         
@@ -134,20 +475,16 @@ class TTSController(QObject):
             self.paused_at_page = self.current_page
             print(f"Пауза на странице {self.paused_at_page + 1}")
             
-            # Останавливаем TTS движок
-            if self.tts_engine:
-                try:
-                    self.tts_engine.stop()
-                    self.tts_engine.endLoop()
-                except:
-                    pass
-            
+            # Движок останавливает сам поток чтения (в обработчиках слов и
+            # фраз) - из GUI-потока его не трогаем, чтобы не прервать
+            # runAndWait на границе предложений и не перечитать его заново
             self.pause_event.set()
+            
             self.paused.emit()
             print(f"Чтение ПАУЗА - сохранена страница {self.paused_at_page + 1}")
     
     def resume_reading(self):
-        """Продолжает чтение с паузы - с той же страницы"""
+        """Продолжает чтение с паузы - с прерванного предложения той же страницы"""
         if self.is_running and self.is_paused:
             self.is_paused = False
             
@@ -165,278 +502,233 @@ class TTSController(QObject):
     def stop_reading(self):
         """Полностью останавливает чтение"""
         if self.is_running:
-            self.should_stop = True
             self.is_running = False
             self.is_paused = False
             
-            # Устанавливаем все события для выхода из блокировок
+            # Устанавливаем все события для выхода из блокировок;
+            # движок остановит поток чтения на ближайшем слове
             self.stop_event.set()
             self.pause_event.set()
             self.resume_event.set()
             
-            # Останавливаем TTS движок
-            if self.tts_engine:
-                try:
-                    self.tts_engine.stop()
-                    self.tts_engine.endLoop()  # Добавьте эту строку
-                except:
-                    pass
-                self.tts_engine = None
-            
-            # Ждем завершения потока
+            # Ждем завершения потока (он сам дожидается производителя)
             if self.tts_thread and self.tts_thread.is_alive():
                 self.tts_thread.join(timeout=2.0)
             
             self.stopped.emit()
     
-    def _read_document(self):
-        """Основная функция чтения документа - ИСПРАВЛЕННАЯ ВЕРСИЯ"""
+    def _page_order(self):
+        """Порядок чтения страниц с текущей, с учетом цикла"""
+        start_page = self.current_page
+        while True:
+            for page_num in range(start_page, self.read_to_page + 1):
+                yield page_num
+            if not self.loop_reading:
+                return
+            print("Начинаем чтение заново (цикл)")
+            start_page = self.read_from_page
+    
+    def _prepare_page(self, page_num):
+        """Предложения страницы для озвучки: [(предложение, язык)]; текст
+        извлечен, очищен и разбит на предложения (с кэшем)"""
+        if page_num in self.page_cache:
+            self.page_cache.move_to_end(page_num)
+            return self.page_cache[page_num]
+        
+        sentences = []
+        for text, language in clean_tts_text(self.text_provider(page_num)):
+            if language is None:
+                language = language_detector.detect(text)
+            sentences.extend((sentence, language) for sentence in split_sentences(text))
+        
+        self.page_cache[page_num] = sentences
+        if len(self.page_cache) > self.page_cache_size:
+            self.page_cache.popitem(last=False)
+        return sentences
+    
+    def _produce_pages(self, page_queue, stop_event):
+        """Поток-производитель: готовит страницы наперед в ограниченную очередь"""
         try:
-            while not self.should_stop:
-                # Начинаем с текущей страницы (может быть восстановлена после паузы)
-                start_page = self.current_page
-                
-                # Читаем страницы в заданном диапазоне
-                for page_num in range(start_page, self.read_to_page + 1):
-                    if self.should_stop:
+            for page_num in self._page_order():
+                if stop_event.is_set():
+                    return
+                item = (page_num, self._prepare_page(page_num))
+                while not stop_event.is_set():
+                    try:
+                        page_queue.put(item, timeout=0.2)
                         break
-                    
-                    # Проверяем паузу перед началом чтения страницы
+                    except queue.Full:
+                        pass
+                if stop_event.is_set():
+                    return
+        except Exception as e:
+            print(f"Ошибка подготовки текста для озвучки: {e}")
+        page_queue.put(None)  # Конец чтения
+    
+    def _next_page(self, page_queue, stop_event):
+        """Следующая подготовленная страница из очереди (None - конец)"""
+        while not stop_event.is_set():
+            try:
+                return page_queue.get(timeout=0.2)
+            except queue.Empty:
+                pass
+        return None
+    
+    def _read_document(self, stop_event):
+        """Основная функция чтения документа: озвучивает страницы из очереди,
+        пока производитель готовит следующие.
+        
+        stop_event - событие остановки этого сеанса чтения."""
+        page_queue = queue.Queue(maxsize=self.lookahead)
+        producer_thread = threading.Thread(target=self._produce_pages, args=(page_queue, stop_event))
+        producer_thread.daemon = True
+        self.page_queue, self.producer_thread = page_queue, producer_thread
+        producer_thread.start()
+        try:
+            while not stop_event.is_set():
+                item = self._next_page(page_queue, stop_event)
+                if item is None:
+                    break
+                page_num, sentences = item
+                
+                # Обновляем текущую страницу
+                self.current_page = page_num
+                self.current_chunk = 0
+                self.word_position = 0
+                self.progress.emit(page_num)
+                
+                # После паузы чтение продолжается с прерванного предложения
+                while not stop_event.is_set() and self.current_chunk < len(sentences):
+                    # Проверяем паузу перед началом чтения
                     if self.pause_event.is_set():
                         print(f"Пауза перед чтением страницы {page_num + 1}")
                         self.resume_event.wait()  # Ждем снятия паузы
                         self.resume_event.clear()
-                        
-                        # После снятия паузы начинаем снова с этой же страницы
-                        if self.should_stop:
-                            break
-                        
-                        # Обновляем текущую страницу (на случай если она изменилась при паузе)
-                        page_num = self.current_page
-                    
-                    # Обновляем текущую страницу
-                    self.current_page = page_num
-                    self.progress.emit(page_num)
-                    
-                    # Получаем текст страницы
-                    text = self.text_provider(page_num)
-                    if not text or not text.strip():
                         continue
                     
                     try:
-                        print(f"Чтение страницы {page_num + 1}: {len(text)} символов")
+                        print(f"Чтение страницы {page_num + 1}: предложения "
+                              f"{self.current_chunk + 1}-{len(sentences)}")
                         
-                        # Для каждой страницы создаем НОВЫЙ движок TTS
-                        self.tts_engine = pyttsx3.init()
-                        self._setup_voice(self.tts_engine)
+                        # Движок создается один раз на сеанс чтения
+                        if self.tts_engine is None:
+                            import pyttsx3  # Загружается при первой озвучке
+                            self.tts_engine = pyttsx3.init()
+                            self.tts_engine.connect('started-utterance', self._on_utterance_started)
+                            self.tts_engine.connect('started-word', self._on_word_started)
+                            self.tts_engine.connect('finished-utterance', self._on_utterance_finished)
                         
-                        # Читаем ВСЮ страницу целиком
-                        self.tts_engine.say(text)
+                        # Каждое предложение - отдельная фраза в очереди движка;
+                        # имя фразы - "номер предложения:смещение", прерванное
+                        # предложение продолжается с того слова, где была пауза.
+                        # Смена голоса тоже ставится в очередь - между фразами
+                        # разных языков. После остановки очередь сброшена,
+                        # голос выставляем заново.
+                        self.applied_voice = None
+                        offset = self.word_position
+                        for index in range(self.current_chunk, len(sentences)):
+                            sentence, language = sentences[index]
+                            self._setup_voice(self.tts_engine, language)
+                            self.tts_engine.say(sentence[offset:], f"{index}:{offset}")
+                            offset = 0
                         self.tts_engine.runAndWait()
-                        
-                        # Проверяем паузу во время чтения
-                        if self.pause_event.is_set():
-                            # Пауза во время чтения страницы
-                            print(f"Пауза во время чтения страницы {page_num + 1}")
-                            # Движок уже остановится автоматически
-                            continue
-                        
+                    
                     except Exception as e:
                         print(f"Ошибка при чтении страницы {page_num}: {e}")
+                        # Сломанный движок пересоздадим на следующей странице
+                        self.tts_engine = None
                     
-                    finally:
-                        # Всегда останавливаем и удаляем движок
-                        if self.tts_engine:
-                            try:
-                                self.tts_engine.stop()
-                            except:
-                                pass
-                            self.tts_engine = None
-                    
-                    # Небольшая пауза между страницами
-                    if not self.should_stop and page_num < self.read_to_page:
-                        time.sleep(0.1)
-                
-                # Если не цикл и не остановка - завершаем
-                if not self.loop_reading or self.should_stop:
-                    break
-                
-                # Для цикла - начинаем сначала
-                print("Начинаем чтение заново (цикл)")
-                self.current_page = self.read_from_page
+                    if not self.pause_event.is_set():
+                        break
+                    print(f"Пауза на странице {page_num + 1}, предложение {self.current_chunk + 1}, "
+                          f"слово с позиции {self.word_position}")
             
             # Завершаем чтение
-            if not self.should_stop:
+            if not stop_event.is_set():
                 self.finished.emit()
             
         except Exception as e:
             self.error.emit(str(e))
         
         finally:
-            # Очищаем ресурсы
-            if self.tts_engine:
-                try:
-                    self.tts_engine.stop()
-                except:
-                    pass
-                self.tts_engine = None
+            # Останавливаем и дожидаемся производителя этого сеанса: он
+            # держит документ для извлечения текста
+            stop_event.set()
+            producer_thread.join(timeout=2.0)
             
-            self.is_running = False
-            self.is_paused = False
+            # Новый сеанс мог начаться, пока этот завершался: его состояние не трогаем
+            if stop_event is self.stop_event:
+                if self.tts_engine:
+                    try:
+                        self.tts_engine.stop()
+                    except:
+                        pass
+                    self.tts_engine = None
+                
+                self.is_running = False
+                self.is_paused = False
+    
+    @staticmethod
+    def _utterance_position(name):
+        """(предложение, смещение) из имени фразы или None"""
+        try:
+            index, offset = name.split(':')
+            return int(index), int(offset)
+        except (AttributeError, ValueError):
+            return None
+    
+    def _stop_engine_if_requested(self):
+        """Пауза или остановка: прерываем runAndWait изнутри потока чтения"""
+        if self.pause_event.is_set() or self.stop_event.is_set():
+            self.tts_engine.stop()
+    
+    def _on_utterance_started(self, name):
+        """Движок начал очередное предложение"""
+        position = self._utterance_position(name)
+        if position is not None:
+            self.current_chunk, self.word_position = position
+        self._stop_engine_if_requested()
+    
+    def _on_word_started(self, name, location, length):
+        position = self._utterance_position(name)
+        if position is not None:
+            self.word_position = position[1] + location
+        self._stop_engine_if_requested()
+    
+    def _on_utterance_finished(self, name, completed):
+        """Предложение дочитано - после паузы продолжаем со следующего"""
+        position = self._utterance_position(name)
+        if completed and position is not None:
+            self.current_chunk, self.word_position = position[0] + 1, 0
+        self._stop_engine_if_requested()
     
-    def _setup_voice(self, tts_engine):
-        """НАДЕЖНЫЙ выбор голоса с понятной логикой и отладкой"""
+    def load_voice_settings(self):
+        """Перечитывает настройки голоса (при старте чтения и после диалога настроек)"""
         settings = QSettings("DeeRTuund", "RuundPDF")
-        use_female = settings.value("tts_use_female", False, type=bool)
-        auto_lang = settings.value("tts_auto_language", True, type=bool)
-
-        # 1. Определяем язык текста
-        text = self._get_current_text()
+        self.use_female = settings.value("tts_use_female", False, type=bool)
+        self.auto_language = settings.value("tts_auto_language", True, type=bool)
+    
+    def _setup_voice(self, tts_engine, text_language=None):
+        """Ставит голос для языка страницы; движок перенастраивается только
+        при смене (язык, пол), ID голоса кэшируется"""
+        # Язык текста определен при подготовке страницы
         language = 'ru'  # По умолчанию русский
+        if self.auto_language and text_language in ('ru', 'en'):
+            language = text_language
         
-        if auto_lang and text and text.strip():
-            # Простой детект по кириллице
-            text_sample = text[:500]
-            russian_count = sum(1 for c in text_sample if 'а' <= c.lower() <= 'я' or c == 'ё')
-            english_count = sum(1 for c in text_sample if 'a' <= c.lower() <= 'z')
-            
-            if russian_count > english_count:
-                language = 'ru'
-            elif english_count > russian_count:
-                language = 'en'
-            # Если оба счетчика 0 или равны, оставляем язык по умолчанию
-        
-        print(f"РЕЖИМ: текст={language}, пол={'женский' if use_female else 'мужской'}")
-
-        # 2. Получаем ВСЕ голоса и логируем их
-        voices = tts_engine.getProperty('voices')
-        print(f"Всего голосов в системе: {len(voices)}")
-        for i, v in enumerate(voices):
-            print(f"  {i+1:2d}. {v.name}")
-            print(f"      ID: {v.id[:60]}...")
-
-        # 3. ИДЕАЛЬНЫЙ ВЫБОР: ищем голос, который ТОЧНО подходит
-        selected_voice = None
-        
-        if language == 'ru' and use_female:
-            print("\n→ Ищу русский женский голос (Ирина)...")
-            # Ищем Ирину
-            for v in voices:
-                v_lower = v.name.lower()
-                v_id_upper = v.id.upper()
-                # Русская Ирина имеет в ID 'TTS_MS_RU-RU_IRINA'
-                if ('irina' in v_lower or 'ирина' in v_lower or 
-                    'TTS_MS_RU-RU_IRINA' in v_id_upper):
-                    selected_voice = v
-                    print(f"   ✓ Найдена Ирина: {v.name}")
-                    break
-
-        elif language == 'ru' and not use_female:
-            print("\n→ Ищу русский мужской голос (Павел/Максим)...")
-            # Сначала ищем Павел
-            for v in voices:
-                v_lower = v.name.lower()
-                v_id_upper = v.id.upper()
-                if ('pavel' in v_lower or 'павел' in v_lower or 
-                    'TTS_MS_RU-RU_PAVEL' in v_id_upper):
-                    selected_voice = v
-                    print(f"   ✓ Найден Павел: {v.name}")
-                    break
-            
-            # Если Павел не найден, ищем Максим
-            if not selected_voice:
-                for v in voices:
-                    v_lower = v.name.lower()
-                    if ('maxim' in v_lower or 'максим' in v_lower):
-                        selected_voice = v
-                        print(f"   ✓ Найден Максим: {v.name}")
-                        break
-            
-            # КРИТИЧНО: Если русского мужского нет - используем русский женский
-            if not selected_voice:
-                print("   ⚠️ Русский мужской голос не найден!")
-                print("   🔄 Использую русский женский голос (Ирина) как запасной вариант")
-                # Ищем Ирину как запасной вариант
-                for v in voices:
-                    v_lower = v.name.lower()
-                    if 'irina' in v_lower or 'ирина' in v_lower:
-                        selected_voice = v
-                        print(f"   → Запасной: {v.name}")
-                        break
-
-        elif language == 'en' and use_female:
-            print("\n→ Ищу английский женский голос (Зира)...")
-            # Ищем Зиру
-            for v in voices:
-                v_lower = v.name.lower()
-                v_id_upper = v.id.upper()
-                if ('zira' in v_lower or 'TTS_MS_EN-US_ZIRA' in v_id_upper):
-                    selected_voice = v
-                    print(f"   ✓ Найдена Зира: {v.name}")
-                    break
-
-        elif language == 'en' and not use_female:
-            print("\n→ Ищу английский мужской голос (Дэвид)...")
-            # Ищем Дэвида
-            for v in voices:
-                v_lower = v.name.lower()
-                v_id_upper = v.id.upper()
-                if ('david' in v_lower or 'TTS_MS_EN-US_DAVID' in v_id_upper):
-                    selected_voice = v
-                    print(f"   ✓ Найден Дэвид: {v.name}")
-                    break
-
-        # 4. Устанавливаем выбранный голос
-        if selected_voice:
+        key = (language, self.use_female)
+        if key == self.applied_voice:
+            return
+        
+        if key not in self.voice_ids:
+            self.voice_ids[key] = find_voice_id(tts_engine, language, self.use_female)
+        voice_id = self.voice_ids[key]
+        if voice_id:
             try:
-                tts_engine.setProperty('voice', selected_voice.id)
-                print(f"\n✅ УСТАНОВЛЕН ГОЛОС: {selected_voice.name}")
-                
-                # Короткий тест произношения
-                test_text = "Привет" if language == 'ru' else "Hello"
-                print(f"   Тест произношения: '{test_text}'")
-                
+                tts_engine.setProperty('voice', voice_id)
             except Exception as e:
-                print(f"\n❌ Ошибка установки голоса: {e}")
-                # Фолбэк на первый голос
-                if voices:
-                    tts_engine.setProperty('voice', voices[0].id)
-                    print(f"   Использую первый доступный голос: {voices[0].name}")
-        else:
-            print("\n⚠️ Подходящий голос не найден!")
-            # Используем первый доступный голос
-            if voices:
-                tts_engine.setProperty('voice', voices[0].id)
-                print(f"   Использую: {voices[0].name}")
-            else:
-                print("   ❌ Нет доступных голосов!")
-        
-        print("=" * 60)
-
-    def _detect_language(self, text):
-        """Определяет язык текста"""
-        if not text or len(text.strip()) < 10:
-            return 'ru'  # По умолчанию русский
-        
-        try:
-            # Берем первые 200 символов для определения
-            sample = text[:200].strip()
-            if sample:
-                return detect(sample)
-        except:
-            pass
-        
-        return 'ru'  # По умолчанию русский
-
-    def _get_current_text(self):
-        """Получает текущий текст для анализа языка"""
-        try:
-            # Получаем текст текущей страницы
-            if hasattr(self, 'text_provider') and hasattr(self, 'current_page'):
-                return self.text_provider(self.current_page)
-        except:
-            pass
-        return ""
+                print(f"Ошибка установки голоса: {e}")
+        self.applied_voice = key
 
 # ============================================================================
 # КЛАССЫ НАСТРОЕК И ПЛЕЕРА (без изменений)
@@ -935,6 +1227,8 @@ class TTSPlayerWidget(QWidget):
         """Показывает настройки чтения"""
         dialog = TTSConfigDialog(self, self)
         if dialog.exec():
+            # Голос сменится со следующей страницы, без пересоздания движка
+            self.controller.load_voice_settings()
             # После применения настроек обновляем информацию
             self.update_display()
     
@@ -952,92 +1246,1348 @@ class TTSPlayerWidget(QWidget):
         event.accept()
 
 # ============================================================================
-# КЛАССЫ ПОИСКА И ПРОСМОТРА С АКТИВНЫМИ ССЫЛКАМИ
+# ЭКСПОРТ АУДИОКНИГИ
 # ============================================================================
+AUDIO_CANCEL_FILE = ".cancel"  # Метка в рабочем каталоге: воркерам пора остановиться
 
-class SearchDialog(QDialog):
+def synthesize_pages(file_path, page_numbers, out_dir, use_female=False, auto_language=True):
+    """Рабочая функция пула экспорта: озвучивает страницы в отдельные WAV.
+
+    Каждый процесс открывает свой документ и свой движок TTS. Абзацы
+    подряд на одном языке идут в один файл, смена языка - новый файл.
+    Возвращает [(страница, [пути к WAV])]; у пустой страницы список пуст.
+    """
+    import pyttsx3
+    document = fitz.open(file_path)
+    engine = pyttsx3.init()
+    voice_ids = {}
+    parts = []
+    try:
+        for page_num in page_numbers:
+            if os.path.exists(os.path.join(out_dir, AUDIO_CANCEL_FILE)):
+                break
+            runs = []  # [язык, [абзацы]]
+            for text, language in language_detector.page_paragraphs(document.load_page(page_num)):
+                if not auto_language or language not in ('ru', 'en'):
+                    language = 'ru'
+                if runs and runs[-1][0] == language:
+                    runs[-1][1].append(text)
+                else:
+                    runs.append([language, [text]])
+            
+            paths = []
+            for number, (language, texts) in enumerate(runs):
+                # Абзацы берем как есть: метки "[lang xx]" здесь не ставятся,
+                # и такой текст в самом PDF не должен обрезать озвучку
+                text = tidy_tts_text("\n".join(texts))
+                if not text:
+                    continue
+                if language not in voice_ids:
+                    voice_ids[language] = find_voice_id(engine, language, use_female)
+                if voice_ids[language]:
+                    engine.setProperty('voice', voice_ids[language])
+                
+                path = os.path.join(out_dir, f"page_{page_num + 1:05d}_{number:02d}.wav")
+                engine.save_to_file(text, path)
+                engine.runAndWait()
+                if os.path.exists(path):
+                    paths.append(path)
+            parts.append((page_num, paths))
+    finally:
+        engine.stop()
+        document.close()
+    return parts
+
+def pcm_to_int16(frames, sampwidth):
+    """PCM-кадры WAV (little-endian) в массив 16-битных отсчетов"""
+    if sampwidth == 1:
+        return array('h', ((b - 128) << 8 for b in frames))  # 8 бит в WAV беззнаковые
+    if sampwidth == 3:
+        return array('h', (int.from_bytes(frames[i + 1:i + 3], 'little', signed=True)
+                           for i in range(0, len(frames), 3)))
+    samples = array('h' if sampwidth == 2 else 'i')
+    samples.frombytes(frames)
+    if sys.byteorder == 'big':
+        samples.byteswap()
+    if sampwidth == 4:
+        samples = array('h', (value >> 16 for value in samples))
+    return samples
+
+def convert_pcm(frames, params, nchannels, framerate):
+    """Приводит кадры WAV к 16 битам с заданными числом каналов и частотой.
+
+    Каналы сводятся в моно и размножаются, частота меняется линейной
+    интерполяцией - для речи этого достаточно.
+    """
+    samples = pcm_to_int16(frames, params.sampwidth)
+    if params.nchannels != nchannels:
+        step = params.nchannels
+        mono = [sum(samples[i:i + step]) // step for i in range(0, len(samples) - step + 1, step)]
+        samples = array('h', (value for value in mono for _ in range(nchannels)))
+    if params.framerate != framerate:
+        count = len(samples) // nchannels
+        out_count = count * framerate // params.framerate
+        resampled = array('h', bytes(2 * out_count * nchannels))
+        ratio = params.framerate / framerate
+        for channel in range(nchannels):
+            source = samples[channel::nchannels]
+            for i in range(out_count):
+                position = i * ratio
+                left = int(position)
+                right = min(left + 1, count - 1)
+                fraction = position - left
+                resampled[i * nchannels + channel] = int(source[left] + (source[right] - source[left]) * fraction)
+        samples = resampled
+    if sys.byteorder == 'big':
+        samples.byteswap()
+    return samples.tobytes()
+
+def concatenate_wav(paths, output_path):
+    """Склеивает WAV-файлы; возвращает время начала каждого файла в секундах.
+
+    Если форматы частей различаются (голоса разных языков синтезируют с
+    разной частотой), все приводится к 16 битам с каналами и частотой
+    первого файла.
+    """
+    import wave
+    formats = []
+    for path in paths:
+        with wave.open(path, 'rb') as part:
+            formats.append((part.getnchannels(), part.getsampwidth(), part.getframerate()))
+    nchannels, sampwidth, framerate = formats[0]
+    if len(set(formats)) > 1:
+        sampwidth = 2
+    
+    offsets = []
+    frames_written = 0
+    with wave.open(output_path, 'wb') as output:
+        output.setnchannels(nchannels)
+        output.setsampwidth(sampwidth)
+        output.setframerate(framerate)
+        for path, part_format in zip(paths, formats):
+            with wave.open(path, 'rb') as part:
+                params = part.getparams()
+                frames = part.readframes(params.nframes)
+            if part_format != (nchannels, sampwidth, framerate):
+                print(f"Перекодирование {os.path.basename(path)}: "
+                      f"{params.nchannels} кан., {params.sampwidth * 8} бит, {params.framerate} Гц")
+                frames = convert_pcm(frames, params, nchannels, framerate)
+            offsets.append(frames_written / framerate)
+            output.writeframes(frames)
+            frames_written += len(frames) // (sampwidth * nchannels)
+    return offsets
+
+def audiobook_chapters(toc, page_offsets, title):
+    """Главы аудиокниги из оглавления PDF: [(название, начало в секундах)].
+
+    page_offsets - {страница: начало ее звука}; глава начинается со своей
+    страницы или первой следующей озвученной. Без оглавления - одна глава.
+    """
+    pages = sorted(page_offsets)
+    chapters = []
+    for level, chapter_title, page in toc:
+        if level != 1:
+            continue
+        index = bisect.bisect_left(pages, page - 1)
+        if index < len(pages):
+            start = page_offsets[pages[index]]
+            if not chapters or start > chapters[-1][1]:
+                chapters.append((chapter_title, start))
+    if not chapters or chapters[0][1] > 0:
+        chapters.insert(0, (title, 0.0))
+    return chapters
+
+def write_cue_sheet(cue_path, audio_name, title, chapters):
+    """CUE-файл с главами: плееры аудиокниг показывают их как треки"""
+    def cue_time(seconds):
+        frames = int(round(seconds * 75))  # В CUE 75 кадров в секунде
+        return f"{frames // 4500:02d}:{frames // 75 % 60:02d}:{frames % 75:02d}"
+    
+    lines = [f'TITLE "{title}"', f'FILE "{audio_name}" WAVE']
+    for number, (chapter_title, start) in enumerate(chapters, 1):
+        lines.append(f"  TRACK {number:02d} AUDIO")
+        lines.append(f'    TITLE "{chapter_title.replace(chr(34), chr(39))}"')
+        lines.append(f"    INDEX 01 {cue_time(start)}")
+    with open(cue_path, 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines) + "\n")
+
+def write_ffmetadata(path, title, chapters, duration):
+    """Главы в формате метаданных ffmpeg (для записи в OGG)"""
+    def escape(value):
+        return re.sub(r"([=;#\\\n])", r"\\\1", value)
+    
+    lines = [";FFMETADATA1", f"title={escape(title)}"]
+    for index, (chapter_title, start) in enumerate(chapters):
+        end = chapters[index + 1][1] if index + 1 < len(chapters) else duration
+        lines += ["[CHAPTER]", "TIMEBASE=1/1000", f"START={int(start * 1000)}",
+                  f"END={int(end * 1000)}", f"title={escape(chapter_title)}"]
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines) + "\n")
+
+class AudiobookExporter(QObject):
+    """Пакетная озвучка диапазона страниц в файл.
+
+    Страницы синтезируются параллельно в пуле процессов (у каждого свой
+    движок TTS, быстрее реального времени), затем склеиваются в один WAV
+    с главами из оглавления; OGG - через ffmpeg, если он установлен.
+    """
+    progress = pyqtSignal(int, int)  # Готово страниц, всего
+    finished = pyqtSignal(str)       # Путь к готовому файлу
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()         # Отмена завершена, воркеры остановлены
+    
+    CHUNK_PAGES = 4
+    
+    def __init__(self):
+        super().__init__()
+        self._cancel_event = None
+    
+    @staticmethod
+    def ogg_available():
+        import shutil
+        return shutil.which("ffmpeg") is not None
+    
+    def start(self, file_path, pages, output_path, workers=None, use_female=False, auto_language=True):
+        self.cancel()
+        self._cancel_event = threading.Event()
+        thread = threading.Thread(
+            target=self._run,
+            args=(file_path, list(pages), output_path, workers or os.cpu_count() or 1,
+                  use_female, auto_language, self._cancel_event)
+        )
+        thread.daemon = True
+        thread.start()
+    
+    def cancel(self):
+        if self._cancel_event:
+            self._cancel_event.set()
+    
+    def _run(self, file_path, pages, output_path, workers, use_female, auto_language, cancel_event):
+        import multiprocessing
+        import shutil
+        import subprocess
+        import tempfile
+        import wave
+        from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+        work_dir = tempfile.mkdtemp(prefix="ruundpdf_audio_")
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        cancelled = False
+        try:
+            with spawn_lock:  # Процессы submit запускает сразу; им нужен главный модуль
+                pending = {
+                    pool.submit(synthesize_pages, file_path, pages[i:i + self.CHUNK_PAGES],
+                                work_dir, use_female, auto_language)
+                    for i in range(0, len(pages), self.CHUNK_PAGES)
+                }
+            parts = {}
+            while pending and not cancel_event.is_set():
+                done, pending = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+                for future in done:
+                    parts.update(future.result())
+                if done:
+                    self.progress.emit(len(parts), len(pages))
+            if cancel_event.is_set():
+                cancelled = True
+                return
+            
+            audio = [(page_num, path) for page_num in pages for path in parts.get(page_num, [])]
+            if not audio:
+                self.failed.emit("В выбранных страницах нет текста для озвучки")
+                return
+            
+            ogg = output_path.lower().endswith(".ogg")
+            wav_path = os.path.join(work_dir, "book.wav") if ogg else output_path
+            offsets = concatenate_wav([path for _, path in audio], wav_path)
+            page_offsets = {}
+            for (page_num, _), offset in zip(audio, offsets):
+                page_offsets.setdefault(page_num, offset)
+            
+            with fitz.open(file_path) as document:
+                toc = document.get_toc()
+                title = document.metadata.get("title") or os.path.splitext(os.path.basename(file_path))[0]
+            chapters = audiobook_chapters(toc, page_offsets, title)
+            
+            if ogg:
+                with wave.open(wav_path, 'rb') as w:
+                    duration = w.getnframes() / w.getframerate()
+                meta_path = os.path.join(work_dir, "chapters.txt")
+                write_ffmetadata(meta_path, title, chapters, duration)
+                subprocess.run(
+                    ["ffmpeg", "-y", "-loglevel", "error", "-i", wav_path, "-i", meta_path,
+                     "-map_metadata", "1", "-map_chapters", "1", "-c:a", "libvorbis", output_path],
+                    check=True
+                )
+            
+            write_cue_sheet(os.path.splitext(output_path)[0] + ".cue",
+                            os.path.basename(output_path), title, chapters)
+            self.finished.emit(output_path)
+        except Exception as e:
+            self.failed.emit(str(e))
+        finally:
+            # Очередь пула отменяется, а уже запущенные части видят метку и
+            # останавливаются после текущей страницы - только потом удаляем каталог
+            with open(os.path.join(work_dir, AUDIO_CANCEL_FILE), 'w'):
+                pass
+            pool.shutdown(wait=True, cancel_futures=True)
+            shutil.rmtree(work_dir, ignore_errors=True)
+            if cancelled:
+                self.cancelled.emit()
+
+class AudiobookExportDialog(QDialog):
+    """Диалог экспорта диапазона страниц в аудиокнигу"""
     def __init__(self, parent=None):
         super().__init__(parent)
         self.parent_app = parent
-        self.search_results = []
-        self.current_result = -1
-        
-        self.setWindowTitle("Поиск в документе")
-        self.setGeometry(300, 300, 500, 400)
+        self.exporter = AudiobookExporter()
+        self.exporter.progress.connect(self.on_progress)
+        self.exporter.finished.connect(self.on_finished)
+        self.exporter.failed.connect(self.on_failed)
+        self.exporter.cancelled.connect(self.on_cancelled)
+        self.running = False
+        
+        self.setWindowTitle("Экспорт аудиокниги")
+        self.setGeometry(300, 300, 450, 250)
         self.setup_ui()
     
     def setup_ui(self):
         layout = QVBoxLayout()
+        page_count = self.parent_app.document.page_count
         
-        search_layout = QHBoxLayout()
-        self.search_input = QLineEdit()
-        self.search_input.setPlaceholderText("Введите текст для поиска...")
-        self.btn_search = QPushButton("Найти")
-        self.btn_search.clicked.connect(self.perform_search)
-        
-        search_layout.addWidget(self.search_input)
-        search_layout.addWidget(self.btn_search)
-        layout.addLayout(search_layout)
-        
-        self.results_list = QListWidget()
-        self.results_list.itemDoubleClicked.connect(self.go_to_result)
-        layout.addWidget(self.results_list)
+        range_layout = QHBoxLayout()
+        range_layout.addWidget(QLabel("Страницы с"))
+        self.from_edit = QLineEdit("1")
+        self.from_edit.setFixedWidth(50)
+        range_layout.addWidget(self.from_edit)
+        range_layout.addWidget(QLabel("по"))
+        self.to_edit = QLineEdit(str(page_count))
+        self.to_edit.setFixedWidth(50)
+        range_layout.addWidget(self.to_edit)
+        range_layout.addStretch()
+        layout.addLayout(range_layout)
+        
+        format_layout = QHBoxLayout()
+        self.radio_wav = QRadioButton("WAV")
+        self.radio_ogg = QRadioButton("OGG")
+        self.radio_wav.setChecked(True)
+        if not AudiobookExporter.ogg_available():
+            self.radio_ogg.setEnabled(False)
+            self.radio_ogg.setToolTip("Для OGG нужен установленный ffmpeg")
+        self.radio_wav.toggled.connect(self.update_extension)
+        format_layout.addWidget(QLabel("Формат:"))
+        format_layout.addWidget(self.radio_wav)
+        format_layout.addWidget(self.radio_ogg)
+        format_layout.addStretch()
+        layout.addLayout(format_layout)
+        
+        path_layout = QHBoxLayout()
+        base = os.path.splitext(self.parent_app.file_path)[0]
+        self.path_edit = QLineEdit(base + ".wav")
+        btn_browse = QPushButton("Обзор...")
+        btn_browse.clicked.connect(self.browse)
+        path_layout.addWidget(self.path_edit)
+        path_layout.addWidget(btn_browse)
+        layout.addLayout(path_layout)
         
-        nav_layout = QHBoxLayout()
-        self.btn_prev = QPushButton("◀ Предыдущий")
-        self.btn_next = QPushButton("Следующий ▶")
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setVisible(False)
+        layout.addWidget(self.progress_bar)
+        self.status_label = QLabel("Главы берутся из оглавления PDF (рядом сохраняется .cue)")
+        layout.addWidget(self.status_label)
+        
+        buttons = QHBoxLayout()
+        self.btn_export = QPushButton("Экспорт")
+        self.btn_export.clicked.connect(self.start_export)
         self.btn_close = QPushButton("Закрыть")
-        
-        self.btn_prev.clicked.connect(self.prev_result)
-        self.btn_next.clicked.connect(self.next_result)
-        self.btn_close.clicked.connect(self.accept)
-        
-        nav_layout.addWidget(self.btn_prev)
-        nav_layout.addWidget(self.btn_next)
-        nav_layout.addStretch()
-        nav_layout.addWidget(self.btn_close)
-        
-        layout.addLayout(nav_layout)
+        self.btn_close.clicked.connect(self.reject)
+        buttons.addStretch()
+        buttons.addWidget(self.btn_export)
+        buttons.addWidget(self.btn_close)
+        layout.addLayout(buttons)
         self.setLayout(layout)
     
-    def perform_search(self):
-        search_text = self.search_input.text().strip()
-        if not search_text or not self.parent_app.document:
+    def update_extension(self):
+        extension = ".wav" if self.radio_wav.isChecked() else ".ogg"
+        self.path_edit.setText(os.path.splitext(self.path_edit.text())[0] + extension)
+    
+    def browse(self):
+        file_filter = "WAV (*.wav)" if self.radio_wav.isChecked() else "OGG (*.ogg)"
+        path, _ = QFileDialog.getSaveFileName(self, "Сохранить аудиокнигу", self.path_edit.text(), file_filter)
+        if path:
+            self.path_edit.setText(path)
+    
+    def start_export(self):
+        if self.running:
+            self.exporter.cancel()
+            self.btn_export.setEnabled(False)
+            self.status_label.setText("Отмена: ожидание остановки синтеза...")
             return
         
-        self.search_results = []
-        self.results_list.clear()
-        
-        for page_num in range(self.parent_app.document.page_count):
-            page = self.parent_app.document.load_page(page_num)
-            text_instances = page.search_for(search_text)
-            
-            for inst in text_instances:
-                self.search_results.append({
-                    'page': page_num,
-                    'rect': inst,
-                    'text': search_text
-                })
-                
-                item_text = f"Страница {page_num + 1}: найдено '{search_text}'"
-                self.results_list.addItem(item_text)
+        page_count = self.parent_app.document.page_count
+        try:
+            from_page = int(self.from_edit.text()) - 1
+            to_page = int(self.to_edit.text()) - 1
+        except ValueError:
+            QMessageBox.warning(self, "Ошибка", "Введите номера страниц числами")
+            return
+        if not (0 <= from_page <= to_page < page_count):
+            QMessageBox.warning(self, "Ошибка", f"Диапазон страниц должен быть в пределах 1-{page_count}")
+            return
         
-        if self.search_results:
-            self.current_result = 0
-            self.highlight_current_result()
-            self.parent_app.status_bar.showMessage(f"Найдено результатов: {len(self.search_results)}")
-        else:
-            self.parent_app.status_bar.showMessage("Текст не найден")
+        settings = QSettings("DeeRTuund", "RuundPDF")
+        workers = settings.value("audiobook_workers", 0, type=int) or None
+        pages = range(from_page, to_page + 1)
+        
+        self.running = True
+        self.btn_export.setText("Отмена")
+        self.progress_bar.setRange(0, len(pages))
+        self.progress_bar.setValue(0)
+        self.progress_bar.setVisible(True)
+        self.status_label.setText("Синтез речи...")
+        self.exporter.start(
+            self.parent_app.source_path, pages, self.path_edit.text(), workers,
+            settings.value("tts_use_female", False, type=bool),
+            settings.value("tts_auto_language", True, type=bool)
+        )
+    
+    def on_progress(self, done, total):
+        self.progress_bar.setValue(done)
+        self.status_label.setText(f"Озвучено страниц: {done} из {total}")
+    
+    def finish(self, message):
+        self.running = False
+        self.btn_export.setText("Экспорт")
+        self.btn_export.setEnabled(True)
+        self.progress_bar.setVisible(False)
+        self.status_label.setText(message)
+    
+    def on_finished(self, path):
+        self.finish(f"Готово: {path}")
+        self.parent_app.status_bar.showMessage(f"Аудиокнига сохранена: {path}", 5000)
+    
+    def on_failed(self, message):
+        if self.running:
+            self.finish(message)
+    
+    def on_cancelled(self):
+        self.on_failed("Экспорт отменен")
+    
+    def reject(self):
+        self.exporter.cancel()
+        super().reject()
+
+# ============================================================================
+# КЛАССЫ ПОИСКА И ПРОСМОТРА С АКТИВНЫМИ ССЫЛКАМИ
+# ============================================================================
+
+def document_fingerprint(file_path, sample_size=1024 * 1024):
+    """Быстрый хэш файла: размер, время изменения, начало и конец
+    (без чтения всего файла; правка в середине меняет время изменения)"""
+    digest = hashlib.sha1()
+    stat = os.stat(file_path)
+    size = stat.st_size
+    digest.update(f"{size}:{stat.st_mtime_ns}".encode())
+    with open(file_path, 'rb') as f:
+        digest.update(f.read(sample_size))
+        if size > sample_size:
+            f.seek(max(sample_size, size - sample_size))
+            digest.update(f.read(sample_size))
+    return digest.hexdigest()
+
+class SearchIndex(QObject):
+    """Постоянный полнотекстовый индекс документа: слово -> страницы и позиции.
+
+    Хранится в SQLite рядом с настройками пользователя, имя файла - хэш
+    пути и хэш содержимого документа, поэтому при повторном открытии
+    индекс уже готов, а индекс прежней версии того же файла удаляется.
+    Общий размер индексов ограничен: давно не открытые удаляются первыми.
+    Строится постранично в фоновом потоке; частично построенный индекс
+    тоже используется - для непроиндексированных страниц поиск идет как обычно.
+    """
+    VERSION = "2"
+    progress = pyqtSignal(int, int)  # проиндексировано страниц, всего страниц
+    completed = pyqtSignal()
+
+    def __init__(self, file_path, page_count, key_path=None, max_mb=512):
+        super().__init__()
+        self.file_path = file_path
+        # Файл, по которому именуется индекс: у восстановленной временной
+        # копии это исходный файл, иначе каждое открытие давало бы новый индекс
+        self.key_path = key_path or file_path
+        self.page_count = page_count
+        self.max_bytes = max_mb * 1024 * 1024
+        self.path = None             # Известен после вычисления хэша в фоне
+        self.is_complete = False
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def index_directory():
+        base = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.GenericConfigLocation)
+        return os.path.join(base, "DeeRTuund", "RuundPDF", "search_index")
+
+    def _index_path(self, directory):
+        """Путь индекса документа; индексы прежних версий этого файла удаляются"""
+        prefix = hashlib.sha1(os.path.abspath(self.key_path).encode()).hexdigest()[:16] + "-"
+        name = prefix + document_fingerprint(self.key_path) + ".sqlite"
+        for other in os.listdir(directory):
+            if other.startswith(prefix) and not other.startswith(name):
+                self._remove_index(os.path.join(directory, other))
+        return os.path.join(directory, name)
+
+    @staticmethod
+    def _remove_index(path):
+        for suffix in ("", "-wal", "-shm"):
+            try:
+                os.remove(path + suffix)
+            except OSError:
+                pass  # Открыт другим экземпляром приложения - удалится в другой раз
+
+    @classmethod
+    def evict(cls, directory, max_bytes, keep=None):
+        """Удаляет давно не открытые индексы, пока их общий размер больше max_bytes.
+
+        Время последнего открытия - mtime файла индекса (_build его обновляет).
+        """
+        indexes = {}  # путь индекса -> [размер с -wal/-shm, mtime]
+        for name in os.listdir(directory):
+            base = name[:-4] if name.endswith(("-wal", "-shm")) else name
+            if not base.endswith(".sqlite"):
+                continue
+            try:
+                stat = os.stat(os.path.join(directory, name))
+            except OSError:
+                continue
+            entry = indexes.setdefault(os.path.join(directory, base), [0, 0.0])
+            entry[0] += stat.st_size
+            if name == base:
+                entry[1] = stat.st_mtime
+        total = sum(size for size, _ in indexes.values())
+        for path, (size, _) in sorted(indexes.items(), key=lambda item: item[1][1]):
+            if total <= max_bytes:
+                break
+            if path != keep:
+                cls._remove_index(path)
+                total -= size
+
+    def _connect(self):
+        import sqlite3
+        db = sqlite3.connect(self.path, timeout=10)
+        db.execute("PRAGMA journal_mode=WAL")
+        return db
+
+    def start_build(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._build)
+            self._thread.daemon = True
+            self._thread.start()
+
+    def stop(self, wait=False):
+        self._stop_event.set()
+        if wait and self._thread is not None:
+            self._thread.join()
+
+    def _build(self):
+        import sqlite3
+        try:
+            directory = self.index_directory()
+            os.makedirs(directory, exist_ok=True)
+            path = self._index_path(directory)
+            if os.path.exists(path):
+                os.utime(path)  # Индекс снова нужен - последним в очереди на удаление
+            self.evict(directory, self.max_bytes, keep=path)
+
+            self.path = path
+            db = self._connect()
+            db.executescript("""
+                CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+                CREATE TABLE IF NOT EXISTS vocab (id INTEGER PRIMARY KEY, word TEXT UNIQUE);
+                CREATE TABLE IF NOT EXISTS postings (word_id INTEGER, page INTEGER,
+                                                     x0 REAL, y0 REAL, x1 REAL, y1 REAL);
+                CREATE INDEX IF NOT EXISTS postings_word ON postings(word_id);
+                CREATE TABLE IF NOT EXISTS pages (page INTEGER PRIMARY KEY);
+            """)
+            try:
+                # Триграммы словаря: поиск подстроки в словах без перебора всего словаря
+                db.execute("CREATE VIRTUAL TABLE IF NOT EXISTS vocab_trigram USING fts5("
+                           "word, content='vocab', content_rowid='id', tokenize='trigram')")
+                trigram = True
+            except sqlite3.OperationalError:
+                trigram = False  # SQLite без FTS5 или старше 3.34 - lookup просмотрит страницы сам
+            meta = dict(db.execute("SELECT key, value FROM meta"))
+            if meta and (meta.get("version"), meta.get("page_count")) != (self.VERSION, str(self.page_count)):
+                # Индекс другой версии - строим заново
+                db.executescript("DELETE FROM postings; DELETE FROM vocab; DELETE FROM pages; DELETE FROM meta;")
+                if trigram:
+                    db.execute("INSERT INTO vocab_trigram(vocab_trigram) VALUES ('delete-all')")
+            db.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)",
+                           [("version", self.VERSION), ("page_count", str(self.page_count))])
+            db.commit()
+
+            vocab = dict(db.execute("SELECT word, id FROM vocab"))
+            done = {row[0] for row in db.execute("SELECT page FROM pages")}
+            todo = [pn for pn in range(self.page_count) if pn not in done]
+
+            document = fitz.open(self.file_path)
+            try:
+                for count, page_num in enumerate(todo, 1):
+                    if self._stop_event.is_set():
+                        break
+                    rows = []
+                    for x0, y0, x1, y1, word, *_ in document.load_page(page_num).get_text("words"):
+                        word = word.casefold()
+                        word_id = vocab.get(word)
+                        if word_id is None:
+                            word_id = db.execute("INSERT INTO vocab (word) VALUES (?)", (word,)).lastrowid
+                            if trigram:
+                                db.execute("INSERT INTO vocab_trigram (rowid, word) VALUES (?, ?)", (word_id, word))
+                            vocab[word] = word_id
+                        rows.append((word_id, page_num, x0, y0, x1, y1))
+                    db.executemany("INSERT INTO postings VALUES (?, ?, ?, ?, ?, ?)", rows)
+                    db.execute("INSERT INTO pages VALUES (?)", (page_num,))
+                    # Фиксируем пачками: прерванную индексацию можно продолжить
+                    if count % 25 == 0 or count == len(todo):
+                        db.commit()
+                        self.progress.emit(len(done) + count, self.page_count)
+                    time.sleep(0)  # Уступаем GIL интерфейсу и рендерингу
+            finally:
+                document.close()
+                db.commit()
+                db.close()
+
+            if not self._stop_event.is_set():
+                self.is_complete = True
+                self.completed.emit()
+        except Exception as e:
+            print(f"Ошибка построения поискового индекса: {e}")
+
+    def indexed_pages(self):
+        """Множество уже проиндексированных страниц"""
+        import sqlite3
+        if self.is_complete:
+            return set(range(self.page_count))
+        if not self.path:
+            return set()
+        try:
+            db = self._connect()
+            try:
+                return {row[0] for row in db.execute("SELECT page FROM pages")}
+            finally:
+                db.close()
+        except sqlite3.Error:
+            return set()
+
+    def lookup(self, text):
+        """Ищет текст по индексу.
+
+        Для одного слова возвращает ({страница: [fitz.Rect]}, страницы):
+        готовые позиции слов, совпавших целиком, и страницы, где текст
+        найден внутри слов, - там позиции уточняет вызывающий. Для фразы -
+        (None, множество страниц-кандидатов), на которых есть все слова.
+        Слова короче трех букв индекс не сужает: кандидаты - все страницы.
+        """
+        tokens = text.casefold().split()
+        db = self._connect()
+        try:
+            if len(tokens) == 1:
+                query = tokens[0]
+                rows = self._postings_containing(db, query)
+                if rows is None:
+                    return None, set(range(self.page_count))
+                hits, partial = {}, set()
+                for word, page_num, x0, y0, x1, y1 in rows:
+                    if word == query:
+                        hits.setdefault(page_num, []).append(fitz.Rect(x0, y0, x1, y1))
+                    else:
+                        partial.add(page_num)
+                for rects in hits.values():
+                    rects.sort(key=lambda r: (r.y0, r.x0))
+                return hits, partial
+
+            pages = None
+            for token in tokens:
+                rows = self._postings_containing(db, token)
+                if rows is None:
+                    continue
+                found = {row[1] for row in rows}
+                pages = found if pages is None else pages & found
+            return None, set(range(self.page_count)) if pages is None else pages
+        finally:
+            db.close()
+
+    @staticmethod
+    def _postings_containing(db, token):
+        """[(слово, страница, x0, y0, x1, y1)] слов, содержащих token;
+        None, если триграммы тут не помогут"""
+        import sqlite3
+        if len(token) < 3:
+            return None
+        try:
+            rows = db.execute(
+                "SELECT v.word, p.page, p.x0, p.y0, p.x1, p.y1 FROM vocab_trigram t "
+                "JOIN vocab v ON v.id = t.rowid JOIN postings p ON p.word_id = v.id "
+                "WHERE vocab_trigram MATCH ?", ('"' + token.replace('"', '""') + '"',))
+        except sqlite3.OperationalError:
+            return None
+        return rows
+
+@functools.lru_cache(maxsize=4096)
+def fold_char(char):
+    """Символ без диакритических знаков: 'é' -> 'e', 'ё' -> 'е'"""
+    return ''.join(c for c in unicodedata.normalize('NFD', char) if not unicodedata.combining(c))
+
+def fold_diacritics(text):
+    return ''.join(fold_char(c) for c in text)
+
+def compile_search_pattern(text, regex=False, whole_word=False, case_sensitive=False, ignore_diacritics=False):
+    """Регулярное выражение для расширенного поиска (re.error при ошибке в выражении)"""
+    pattern = text if regex else re.escape(text)
+    if ignore_diacritics:
+        pattern = fold_diacritics(pattern)
+    if whole_word:
+        # Не \b: у "C++", "#include", ".NET" по краям не буквы, и \b там не сработает
+        pattern = rf"(?<!\w)(?:{pattern})(?!\w)"
+    return re.compile(pattern, 0 if case_sensitive else re.IGNORECASE)
+
+class PageCharLayer:
+    """Текст страницы посимвольно с прямоугольниками символов (координаты PDF).
+
+    Строки разделены переводом строки с пустым прямоугольником, поэтому найденный
+    диапазон символов разбивается на прямоугольники по строкам.
+    """
+    
+    def __init__(self, page):
+        chars = []
+        self.boxes = array('f')  # x0, y0, x1, y1 каждого символа
+        for block in page.get_text("rawdict").get("blocks", []):
+            for line in block.get("lines", []):
+                for span in line["spans"]:
+                    for char in span["chars"]:
+                        chars.append(char["c"])
+                        self.boxes.extend(char["bbox"])
+                chars.append('\n')
+                self.boxes.extend((0, 0, 0, 0))
+        self.text = ''.join(chars)
+        self._folded = None
+    
+    def size_bytes(self):
+        return len(self.text) * 20
+    
+    def folded(self):
+        """Текст без диакритики и позиции его символов в исходном тексте"""
+        if self._folded is None:
+            parts = []
+            positions = array('i')
+            for i, char in enumerate(self.text):
+                folded = fold_char(char)
+                parts.append(folded)
+                positions.extend([i] * len(folded))
+            positions.append(len(self.text))
+            self._folded = (''.join(parts), positions)
+        return self._folded
+    
+    def find(self, pattern, fold=False):
+        """Прямоугольники совпадений: по одному на строку каждого совпадения"""
+        text, positions = self.folded() if fold else (self.text, None)
+        rects = []
+        for match in pattern.finditer(text):
+            start, end = match.span()
+            if start == end:
+                continue
+            if positions is not None:
+                start, end = positions[start], positions[end - 1] + 1
+            rects.extend(self.char_rects(start, end))
+        return rects
+    
+    def char_rects(self, start, end):
+        """Объединяет прямоугольники символов [start, end) построчно"""
+        rects = []
+        current = None
+        for i in range(start, end):
+            if self.text[i] == '\n':
+                if current is not None:
+                    rects.append(current)
+                    current = None
+                continue
+            box = fitz.Rect(*self.boxes[i * 4:i * 4 + 4])
+            current = box if current is None else current | box
+        if current is not None:
+            rects.append(current)
+        return rects
+
+class PageTextCache:
+    """Посимвольные слои страниц документа для расширенного поиска.
+
+    Слой страницы строится один раз и переиспользуется следующими
+    запросами. Кэш заполняется до бюджета, дальше новые слои не
+    сохраняются: поиск просматривает страницы подряд, и вытеснение
+    старых слоев (LRU) при каждом проходе выбрасывало бы весь кэш.
+    Доступ из потока поиска - под блокировкой.
+    """
+    
+    def __init__(self, budget_mb=128):
+        self.budget = budget_mb * 1024 * 1024
+        self.used = 0
+        self.layers = {}
+        self.lock = threading.Lock()
+    
+    def get(self, document, page_num):
+        with self.lock:
+            layer = self.layers.get(page_num)
+        if layer is not None:
+            return layer
+        
+        layer = PageCharLayer(document.load_page(page_num))
+        with self.lock:
+            if page_num not in self.layers and self.used + layer.size_bytes() <= self.budget:
+                self.layers[page_num] = layer
+                self.used += layer.size_bytes()
+        return layer
+    
+    def set_budget_mb(self, budget_mb):
+        """Меняет бюджет; лишние слои отбрасываются с конца (последние добавленные)"""
+        with self.lock:
+            self.budget = int(budget_mb * 1024 * 1024)
+            while self.used > self.budget and self.layers:
+                _, layer = self.layers.popitem()
+                self.used -= layer.size_bytes()
+
+class SearchWorker(QObject):
+    """Поиск по документу в фоновом потоке.
+
+    Результаты выдаются пачками по мере нахождения; каждый запуск
+    получает номер, и сигналы устаревших (отмененных) поисков
+    вызывающий просто игнорирует.
+    """
+    results_found = pyqtSignal(int, list)   # номер поиска, [(страница, fitz.Rect)]
+    progress = pyqtSignal(int, int, int)    # номер поиска, обработано страниц, всего страниц
+    finished = pyqtSignal(int, bool)        # номер поиска, был ли поиск отменен
+
+    PARALLEL_MIN_PAGES = 64  # Меньше страниц быстрее просмотреть в одном потоке
+    MAX_CHUNK_PAGES = 32
+
+    def __init__(self, pool):
+        super().__init__()
+        self.pool = pool  # SharedProcessPool приложения, общий для всех вкладок
+        self.search_id = 0
+        self._cancel_event = None
+        self._thread = None
+
+    def shutdown(self, wait=False):
+        """wait - дождаться потока поиска и его заданий в пуле (файл больше никем не открыт)"""
+        self.cancel()
+        if wait and self._thread is not None:
+            self._thread.join()
+
+    def start(self, file_path, text, index=None, pattern=None, fold=False, text_cache=None):
+        """Отменяет текущий поиск и запускает новый; возвращает его номер.
+
+        index - SearchIndex документа: проиндексированные страницы
+        берутся из него, остальные просматриваются через search_for.
+        pattern - регулярное выражение расширенного поиска (см.
+        compile_search_pattern); тогда поиск идет по слоям text_cache.
+        """
+        self.cancel()
+        self.search_id += 1
+        self._cancel_event = threading.Event()
+        if pattern is not None:
+            target = self._run_pattern
+            args = (self.search_id, file_path, text, index, self._cancel_event, pattern, fold, text_cache)
+        else:
+            target = self._run
+            args = (self.search_id, file_path, text, index, self._cancel_event)
+        self._thread = threading.Thread(target=target, args=args)
+        self._thread.daemon = True
+        self._thread.start()
+        return self.search_id
+
+    def cancel(self):
+        if self._cancel_event:
+            self._cancel_event.set()
+
+    def _run(self, search_id, file_path, text, index, cancel_event):
+        try:
+            document = fitz.open(file_path)
+        except Exception as e:
+            print(f"Поиск не смог открыть файл: {e}")
+            self.finished.emit(search_id, True)
+            return
+
+        indexed, index_hits, candidates = set(), None, None
+        if index:
+            try:
+                indexed = index.indexed_pages()
+                if indexed:
+                    index_hits, candidates = index.lookup(text)
+            except Exception as e:
+                print(f"Поиск по индексу недоступен: {e}")
+                indexed = set()
+
+        pool_chunks = {}
+        in_word = re.compile(re.escape(text), re.IGNORECASE)
+        self.pool.acquire()
+        try:
+            total = document.page_count
+            to_scan = [pn for pn in range(total)
+                       if pn not in indexed or (index_hits is None and pn in candidates)]
+            pool_chunks = self._submit_chunks(file_path, text, to_scan)
+            pool_pages = {}   # страница -> [fitz.Rect] из готовых пачек пула
+            batch = []
+            last_emit = 0.0
+            for page_num in range(total):
+                if cancel_event.is_set():
+                    break
+                if page_num in pool_chunks:
+                    # Результаты пула забираем строго по порядку страниц
+                    pool_pages.update(self._collect_chunk(document, text, pool_chunks.pop(page_num), cancel_event))
+                if page_num in pool_pages:
+                    rects = pool_pages.pop(page_num)
+                elif page_num not in indexed:
+                    rects = document.load_page(page_num).search_for(text)
+                elif index_hits is not None and page_num in candidates:
+                    # Совпадения внутри слов: индекс знает только рамку всего слова,
+                    # точные прямоугольники - по символам страницы
+                    rects = PageCharLayer(document.load_page(page_num)).find(in_word)
+                elif index_hits is not None:
+                    rects = index_hits.get(page_num, [])
+                elif page_num in candidates:
+                    rects = document.load_page(page_num).search_for(text)
+                else:
+                    rects = []
+                for rect in rects:
+                    batch.append((page_num, rect))
+
+                # Первые результаты отдаем сразу, дальше - не чаще 10 раз в секунду
+                now = time.monotonic()
+                if now - last_emit > 0.1 or page_num == total - 1:
+                    if batch:
+                        self.results_found.emit(search_id, batch)
+                        batch = []
+                    self.progress.emit(search_id, page_num + 1, total)
+                    last_emit = now
+        finally:
+            # Пул общий с другими вкладками: отменяем только свои задания и
+            # ждем уже начатые - после этого файл в пуле никем не открыт
+            futures = [future for future, _ in pool_chunks.values()]
+            for future in futures:
+                future.cancel()
+            if futures:
+                from concurrent.futures import wait
+                wait(futures)
+            self.pool.release()
+            document.close()
+
+        self.finished.emit(search_id, cancel_event.is_set())
+
+    def _run_pattern(self, search_id, file_path, prefilter, index, cancel_event, pattern, fold, text_cache):
+        """Расширенный поиск (регулярное выражение, слово целиком, регистр,
+        диакритика) по посимвольным слоям страниц из text_cache.
+
+        prefilter - простой текст, который обязан встретиться на странице
+        (или None); по нему индекс отсекает заведомо пустые страницы.
+        """
+        try:
+            document = fitz.open(file_path)
+        except Exception as e:
+            print(f"Поиск не смог открыть файл: {e}")
+            self.finished.emit(search_id, True)
+            return
+
+        total = document.page_count
+        pages = range(total)
+        if index and prefilter:
+            try:
+                indexed = index.indexed_pages()
+                if indexed:
+                    index_hits, candidates = index.lookup(prefilter)
+                    if index_hits is not None:
+                        candidates = candidates | set(index_hits)
+                    pages = [pn for pn in range(total) if pn not in indexed or pn in candidates]
+            except Exception as e:
+                print(f"Поиск по индексу недоступен: {e}")
+        if text_cache is None:
+            text_cache = PageTextCache()
+
+        try:
+            batch = []
+            last_emit = 0.0
+            for page_num in pages:
+                if cancel_event.is_set():
+                    break
+                for rect in text_cache.get(document, page_num).find(pattern, fold):
+                    batch.append((page_num, rect))
+
+                now = time.monotonic()
+                if now - last_emit > 0.1 or page_num == pages[-1]:
+                    if batch:
+                        self.results_found.emit(search_id, batch)
+                        batch = []
+                    self.progress.emit(search_id, page_num + 1, total)
+                    last_emit = now
+        finally:
+            document.close()
+
+        self.finished.emit(search_id, cancel_event.is_set())
+
+    def _submit_chunks(self, file_path, text, pages):
+        """Раздает страницы пулу процессов пачками; {первая страница: (future, страницы)}.
+
+        Первые пачки маленькие, чтобы первый результат появился быстро.
+        """
+        if len(pages) < self.PARALLEL_MIN_PAGES or self.pool.max_workers < 2:
+            return {}
+        chunks = {}
+        try:
+            size = 4
+            start = 0
+            while start < len(pages):
+                chunk = pages[start:start + size]
+                chunks[chunk[0]] = (self.pool.submit(search_pages_in_process, file_path, text, chunk), chunk)
+                start += size
+                size = min(size * 2, self.MAX_CHUNK_PAGES)
+            return chunks
+        except Exception as e:
+            print(f"Параллельный поиск недоступен: {e}")
+            return chunks  # Остальные страницы поток просмотрит сам
+
+    def _collect_chunk(self, document, text, chunk, cancel_event):
+        """Ждет пачку из пула (с проверкой отмены); при ошибке ищет сам"""
+        from concurrent.futures import TimeoutError as FutureTimeoutError
+        future, pages = chunk
+        found = {page_num: [] for page_num in pages}
+        while not cancel_event.is_set():
+            try:
+                for page_num, rect in future.result(timeout=0.1):
+                    found[page_num].append(fitz.Rect(rect))
+                return found
+            except FutureTimeoutError:
+                continue
+            except Exception as e:
+                print(f"Ошибка в процессе поиска, продолжаю в потоке: {e}")
+                return {page_num: document.load_page(page_num).search_for(text) for page_num in pages}
+        return {}
+
+class SearchResultStore:
+    """Компактное хранилище результатов поиска: номера страниц и
+    прямоугольники упакованы в массивы, без объекта на каждое совпадение.
+
+    Поиск идет по порядку страниц, поэтому совпадения одной страницы
+    занимают непрерывный диапазон строк.
+    """
+    
+    def __init__(self):
+        self.pages = array('i')
+        self.rects = array('d')  # x0, y0, x1, y1 подряд
+        self.page_rows = {}      # страница -> [первая строка, последняя + 1]
+    
+    def __len__(self):
+        return len(self.pages)
+    
+    def append(self, page_num, rect):
+        row = len(self.pages)
+        self.pages.append(page_num)
+        self.rects.extend((rect[0], rect[1], rect[2], rect[3]))
+        rows = self.page_rows.get(page_num)
+        if rows:
+            rows[1] = row + 1
+        else:
+            self.page_rows[page_num] = [row, row + 1]
+    
+    def page(self, row):
+        return self.pages[row]
+    
+    def rect(self, row):
+        return fitz.Rect(*self.rects[row * 4:row * 4 + 4])
+    
+    def rows_on_page(self, page_num):
+        """Диапазон строк с совпадениями на странице"""
+        rows = self.page_rows.get(page_num)
+        return range(*rows) if rows else range(0)
+
+class SearchResultsModel(QAbstractListModel):
+    """Модель списка результатов: текст строки строится только для видимых
+    строк, фрагменты контекста запрашиваются по требованию и кэшируются.
+
+    Представлению строки отдаются порциями (fetchMore) по мере прокрутки:
+    раскладка view обходит все известные ей строки, и 100k строк сразу
+    подвешивали бы интерфейс на каждой пачке результатов.
+    """
+    
+    SNIPPET_CACHE_SIZE = 512
+    FETCH_BATCH = 500
+    
+    def __init__(self, snippet_provider, parent=None):
+        super().__init__(parent)
+        self.store = SearchResultStore()
+        self.snippet_provider = snippet_provider
+        self.snippets = OrderedDict()
+        self.exposed = 0
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.exposed
+    
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self.exposed < len(self.store)
+    
+    def fetchMore(self, parent=QModelIndex()):
+        self.expose(self.exposed + self.FETCH_BATCH)
+    
+    def expose(self, count):
+        """Делает видимыми для представления первые count строк"""
+        count = min(count, len(self.store))
+        if count > self.exposed:
+            self.beginInsertRows(QModelIndex(), self.exposed, count - 1)
+            self.exposed = count
+            self.endInsertRows()
+    
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+        row = index.row()
+        return f"Страница {self.store.page(row) + 1}: {self.snippet(row)}"
+    
+    def snippet(self, row):
+        if row in self.snippets:
+            self.snippets.move_to_end(row)
+            return self.snippets[row]
+        text = self.snippet_provider(self.store.page(row), self.store.rect(row))
+        self.snippets[row] = text
+        if len(self.snippets) > self.SNIPPET_CACHE_SIZE:
+            self.snippets.popitem(last=False)
+        return text
+    
+    def add_hits(self, hits):
+        for page_num, rect in hits:
+            self.store.append(page_num, rect)
+        # Первую порцию показываем сразу, остальное - по прокрутке
+        if self.exposed < self.FETCH_BATCH:
+            self.expose(self.FETCH_BATCH)
+    
+    def clear(self):
+        self.beginResetModel()
+        self.store = SearchResultStore()
+        self.snippets.clear()
+        self.exposed = 0
+        self.endResetModel()
+
+class SearchDialog(QDialog):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.parent_app = parent
+        self.results_model = SearchResultsModel(self.result_snippet, self)
+        self.current_result = -1
+        self.search_text = ""
+        
+        self.worker = SearchWorker(parent.search_pool)
+        self.worker.results_found.connect(self.on_results_found)
+        self.worker.progress.connect(self.on_search_progress)
+        self.worker.finished.connect(self.on_search_finished)
+        self.active_search_id = None
+        
+        self.setWindowTitle("Поиск в документе")
+        self.setGeometry(300, 300, 500, 400)
+        self.setup_ui()
+    
+    @property
+    def search_results(self):
+        """Хранилище найденных совпадений (SearchResultStore)"""
+        return self.results_model.store
+    
+    def result_snippet(self, page_num, rect, width=80):
+        """Строка текста вокруг совпадения - для списка результатов"""
+        document = self.parent_app.document
+        if not document or page_num >= document.page_count:
+            return self.search_text
+        try:
+            page = document.load_page(page_num)
+            line = fitz.Rect(page.rect.x0, rect.y0, page.rect.x1, rect.y1)
+            text = " ".join(page.get_text("text", clip=line).split())
+        except Exception:
+            return self.search_text
+        
+        pos = text.lower().find(self.search_text.lower())
+        if pos < 0 or len(text) <= width:
+            return text[:width] or self.search_text
+        start = max(0, min(pos - width // 3, len(text) - width))
+        prefix = "…" if start > 0 else ""
+        suffix = "…" if start + width < len(text) else ""
+        return prefix + text[start:start + width] + suffix
+    
+    def setup_ui(self):
+        layout = QVBoxLayout()
+        
+        search_layout = QHBoxLayout()
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Введите текст для поиска...")
+        self.search_input.returnPressed.connect(self.perform_search)
+        # Новый ввод делает текущий поиск бессмысленным - отменяем его
+        self.search_input.textChanged.connect(self.cancel_search)
+        self.btn_search = QPushButton("Найти")
+        self.btn_search.clicked.connect(self.perform_search)
+        self.btn_cancel = QPushButton("Отмена")
+        self.btn_cancel.clicked.connect(self.cancel_search)
+        self.btn_cancel.setEnabled(False)
+        
+        search_layout.addWidget(self.search_input)
+        search_layout.addWidget(self.btn_search)
+        search_layout.addWidget(self.btn_cancel)
+        layout.addLayout(search_layout)
+        
+        options_layout = QHBoxLayout()
+        self.check_regex = QCheckBox("Регулярное выражение")
+        self.check_whole_word = QCheckBox("Слово целиком")
+        self.check_case = QCheckBox("Учитывать регистр")
+        self.check_diacritics = QCheckBox("Без учета диакритики")
+        self.check_diacritics.setToolTip("е = ё, e = é и т.п.")
+        for check in (self.check_regex, self.check_whole_word, self.check_case, self.check_diacritics):
+            check.toggled.connect(self.cancel_search)
+            options_layout.addWidget(check)
+        options_layout.addStretch()
+        layout.addLayout(options_layout)
+        
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setVisible(False)
+        layout.addWidget(self.progress_bar)
+        
+        # Плоский QTreeView: с одинаковой высотой строк раскладка дешевле QListView
+        self.results_list = QTreeView()
+        self.results_list.setUniformRowHeights(True)
+        self.results_list.setRootIsDecorated(False)
+        self.results_list.setHeaderHidden(True)
+        self.results_list.setModel(self.results_model)
+        self.results_list.doubleClicked.connect(self.go_to_result)
+        layout.addWidget(self.results_list)
+        
+        nav_layout = QHBoxLayout()
+        self.btn_prev = QPushButton("◀ Предыдущий")
+        self.btn_next = QPushButton("Следующий ▶")
+        self.btn_close = QPushButton("Закрыть")
+        
+        self.btn_prev.clicked.connect(self.prev_result)
+        self.btn_next.clicked.connect(self.next_result)
+        self.btn_close.clicked.connect(self.accept)
+        
+        nav_layout.addWidget(self.btn_prev)
+        nav_layout.addWidget(self.btn_next)
+        nav_layout.addStretch()
+        nav_layout.addWidget(self.btn_close)
+        
+        layout.addLayout(nav_layout)
+        self.setLayout(layout)
+    
+    def perform_search(self):
+        search_text = self.search_input.text().strip()
+        if not search_text or not self.parent_app.document:
+            return
+        
+        regex = self.check_regex.isChecked()
+        fold = self.check_diacritics.isChecked()
+        pattern = None
+        if regex or fold or self.check_whole_word.isChecked() or self.check_case.isChecked():
+            try:
+                pattern = compile_search_pattern(
+                    search_text, regex, self.check_whole_word.isChecked(), self.check_case.isChecked(), fold
+                )
+            except re.error as e:
+                QMessageBox.warning(self, "Поиск", f"Ошибка в регулярном выражении:\n{e}")
+                return
+        
+        self.clear_results()
+        self.search_text = search_text
+        
+        self.progress_bar.setRange(0, self.parent_app.document.page_count)
+        self.progress_bar.setValue(0)
+        self.progress_bar.setVisible(True)
+        self.btn_cancel.setEnabled(True)
+        if pattern is None:
+            self.active_search_id = self.worker.start(
+                self.parent_app.source_path, search_text, self.parent_app.search_index
+            )
+        else:
+            # Индекс отсекает страницы без искомого текста, если тот буквальный
+            prefilter = None if regex or fold else search_text
+            self.active_search_id = self.worker.start(
+                self.parent_app.source_path, prefilter, self.parent_app.search_index,
+                pattern, fold, self.parent_app.page_text_cache
+            )
+        self.parent_app.status_bar.showMessage(f"Поиск '{search_text}'...")
+    
+    def cancel_search(self):
+        """Отменяет выполняющийся поиск (найденное остается в списке)"""
+        if self.active_search_id is not None:
+            self.worker.cancel()
+    
+    def clear_results(self):
+        self.cancel_search()
+        self.active_search_id = None
+        self.results_model.clear()
+        self.current_result = -1
+        if self.is_active():
+            self.parent_app.update_search_overlay()
+        self.progress_bar.setVisible(False)
+        self.btn_cancel.setEnabled(False)
+    
+    def is_active(self):
+        """Диалог активной вкладки. Поиск во вкладке, ушедшей в фон, продолжается,
+        но окно (страницу, подсветку, строку состояния) он не трогает"""
+        return self.parent_app.search_dialog is self
+    
+    def on_results_found(self, search_id, hits):
+        """Добавляет очередную пачку результатов из фонового поиска"""
+        if search_id != self.active_search_id:
+            return
+        
+        self.results_model.add_hits(hits)
+        
+        # Первый результат показываем сразу, не дожидаясь конца поиска
+        if self.current_result < 0 and self.search_results:
+            self.current_result = 0
+            if self.is_active():
+                self.highlight_current_result()
+        elif self.is_active() and any(page_num == self.parent_app.current_page_num for page_num, _ in hits):
+            self.parent_app.update_search_overlay()
+    
+    def on_search_progress(self, search_id, done, total):
+        if search_id != self.active_search_id:
+            return
+        self.progress_bar.setValue(done)
+        if self.is_active():
+            self.parent_app.status_bar.showMessage(
+                f"Поиск: страница {done} из {total}, найдено {len(self.search_results)}"
+            )
+    
+    def on_search_finished(self, search_id, cancelled):
+        if search_id != self.active_search_id:
+            return
+        self.active_search_id = None
+        self.progress_bar.setVisible(False)
+        self.btn_cancel.setEnabled(False)
+        
+        if not self.is_active():
+            return
+        if self.search_results:
+            suffix = " (поиск отменен)" if cancelled else ""
+            self.parent_app.status_bar.showMessage(f"Найдено результатов: {len(self.search_results)}{suffix}")
+        elif cancelled:
+            self.parent_app.status_bar.showMessage("Поиск отменен")
+        else:
+            self.parent_app.status_bar.showMessage("Текст не найден")
+    
+    def closeEvent(self, event):
+        self.cancel_search()
+        super().closeEvent(event)
+    
+    def shutdown(self, wait=False):
+        """Останавливает поиск и пул процессов (при закрытии вкладки)"""
+        self.worker.shutdown(wait)
     
     def highlight_current_result(self):
         if not self.search_results or self.current_result < 0:
             return
         
-        result = self.search_results[self.current_result]
-        self.parent_app.current_page_num = result['page']
-        self.parent_app.render_page()
-        self.parent_app.highlight_search_result(result['rect'], result['text'])
-        self.results_list.setCurrentRow(self.current_result)
+        row = self.current_result
+        self.parent_app.highlight_search_result(self, row)
+        self.results_model.expose(row + 1)
+        self.results_list.setCurrentIndex(self.results_model.index(row))
     
     def prev_result(self):
         if self.search_results and self.current_result > 0:
@@ -1049,12 +2599,59 @@ class SearchDialog(QDialog):
             self.current_result += 1
             self.highlight_current_result()
     
-    def go_to_result(self, item):
-        row = self.results_list.row(item)
+    def go_to_result(self, index):
+        row = index.row()
         if 0 <= row < len(self.search_results):
             self.current_result = row
             self.highlight_current_result()
 
+class SearchHighlightItem(QGraphicsItem):
+    """Все совпадения поиска на странице одним элементом сцены;
+    текущее совпадение выделено цветом и рамкой"""
+    
+    def __init__(self):
+        super().__init__()
+        self.rects = []
+        self.first_row = 0
+        self.current = -1
+        self.bounds = QRectF()
+    
+    def set_hits(self, rects, first_row, current_row):
+        self.prepareGeometryChange()
+        self.rects = rects
+        self.first_row = first_row
+        self.current = current_row - first_row
+        self.bounds = QRectF()
+        for rect in rects:
+            self.bounds = self.bounds.united(rect)
+        self.bounds.adjust(-2, -2, 2, 2)
+        self.update()
+    
+    def set_current_row(self, row):
+        self.current = row - self.first_row
+        self.update()
+    
+    def current_rect(self):
+        if 0 <= self.current < len(self.rects):
+            return self.rects[self.current]
+        return None
+    
+    def boundingRect(self):
+        return self.bounds
+    
+    def paint(self, painter, option, widget=None):
+        painter.setPen(QPen(Qt.PenStyle.NoPen))
+        painter.setBrush(QBrush(QColor(255, 255, 0, 100)))
+        for i, rect in enumerate(self.rects):
+            if i != self.current:
+                painter.drawRect(rect)
+        
+        current = self.current_rect()
+        if current is not None:
+            painter.setPen(QPen(QColor(230, 120, 0), 2))
+            painter.setBrush(QBrush(QColor(255, 150, 0, 130)))
+            painter.drawRect(current)
+
 class PDFGraphicsView(QGraphicsView):
     def __init__(self, scene, main_app):
         super().__init__(scene)
@@ -1065,9 +2662,6 @@ class PDFGraphicsView(QGraphicsView):
         self.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
         self.setMouseTracking(True)
         
-        # Для обработки кликов по ссылкам
-        self.clickable_links = []  # Список активных ссылок на текущей странице
-        
     def dragEnterEvent(self, event):
         if event.mimeData().hasUrls():
             urls = event.mimeData().urls()
@@ -1088,6 +2682,24 @@ class PDFGraphicsView(QGraphicsView):
                 event.acceptProposedAction()
         self.setStyleSheet("")
     
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        # Видимая область изменилась - нужны другие плитки
+        if hasattr(self.main_app, 'viewport_timer'):
+            self.main_app.viewport_timer.start()
+    
+    def drawBackground(self, painter, rect):
+        """В непрерывном режиме рисует заглушки страниц без растров"""
+        super().drawBackground(painter, rect)
+        layout = self.main_app.continuous_layout
+        if not self.main_app.continuous_mode or layout is None:
+            return
+        
+        painter.setPen(QColor(160, 160, 160))
+        painter.setBrush(QBrush(Qt.GlobalColor.white))
+        for page_num in layout.pages_between(rect.top(), rect.bottom()):
+            painter.drawRect(layout.page_rect(page_num))
+    
     def wheelEvent(self, event):
         if event.modifiers() == Qt.KeyboardModifier.ControlModifier:
             delta = event.angleDelta().y()
@@ -1095,6 +2707,9 @@ class PDFGraphicsView(QGraphicsView):
                 self.main_app.zoom_slider.setValue(self.main_app.zoom_slider.value() + 10)
             elif delta < 0:
                 self.main_app.zoom_slider.setValue(self.main_app.zoom_slider.value() - 10)
+        elif self.main_app.continuous_mode:
+            # Лента страниц прокручивается как обычный документ
+            super().wheelEvent(event)
         else:
             delta = event.angleDelta().y()
             if delta > 0:
@@ -1110,23 +2725,26 @@ class PDFGraphicsView(QGraphicsView):
             scene_pos = self.mapToScene(pos)
             
             # Проверяем, кликнули ли на активную ссылку
-            for link in self.clickable_links:
-                if link['rect'].contains(scene_pos):
-                    print(f"Клик по ссылке: {link['uri']}")
-                    # Открываем ссылку в браузере (БЕЗОПАСНО, с обработкой ошибок)
-                    try:
-                        # Проверяем, является ли ссылка валидным URL
-                        url = QUrl(link['uri'])
-                        if url.isValid():
-                            QDesktopServices.openUrl(url)
-                            self.main_app.status_bar.showMessage(f"Открыта ссылка: {link['uri'][:50]}...")
-                        else:
-                            print(f"Неверный URL: {link['uri']}")
-                            self.main_app.status_bar.showMessage(f"Неверная ссылка: {link['uri'][:50]}...")
-                    except Exception as e:
-                        print(f"Ошибка при открытии ссылки: {e}")
-                        self.main_app.status_bar.showMessage("Ошибка при открытии ссылки")
-                    return
+            link = self.main_app.link_at(scene_pos)
+            if link and link['type'] == 'internal':
+                self.main_app.follow_internal_link(link)
+                return
+            if link:
+                print(f"Клик по ссылке: {link['uri']}")
+                # Открываем ссылку в браузере (БЕЗОПАСНО, с обработкой ошибок)
+                try:
+                    # Проверяем, является ли ссылка валидным URL
+                    url = QUrl(link['uri'])
+                    if url.isValid():
+                        QDesktopServices.openUrl(url)
+                        self.main_app.status_bar.showMessage(f"Открыта ссылка: {link['uri'][:50]}...")
+                    else:
+                        print(f"Неверный URL: {link['uri']}")
+                        self.main_app.status_bar.showMessage(f"Неверная ссылка: {link['uri'][:50]}...")
+                except Exception as e:
+                    print(f"Ошибка при открытии ссылки: {e}")
+                    self.main_app.status_bar.showMessage("Ошибка при открытии ссылки")
+                return
             
             # Если не кликнули на ссылку, вызываем стандартную обработку
             if self.main_app.is_text_select_mode:
@@ -1148,11 +2766,7 @@ class PDFGraphicsView(QGraphicsView):
         scene_pos = self.mapToScene(pos)
         
         # Проверяем, находимся ли над ссылкой
-        cursor_over_link = False
-        for link in self.clickable_links:
-            if link['rect'].contains(scene_pos):
-                cursor_over_link = True
-                break
+        cursor_over_link = self.main_app.link_at(scene_pos) is not None
         
         # Меняем курсор если над ссылкой
         if cursor_over_link:
@@ -1250,6 +2864,872 @@ class PDFGraphicsView(QGraphicsView):
                     text_info
                 )
 
+# ============================================================================
+# ФОНОВЫЙ РЕНДЕРИНГ СТРАНИЦ
+# ============================================================================
+class PixmapCache:
+    """LRU-кэш готовых растров с ограничением по памяти.
+
+    Ключ - (страница, масштаб, поворот). При превышении бюджета
+    вытесняются давно не использованные растры.
+    """
+    def __init__(self, budget_mb=256):
+        self.budget_bytes = int(budget_mb * 1024 * 1024)
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()  # ключ -> (QPixmap, размер в байтах)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+    @staticmethod
+    def pixmap_bytes(pixmap):
+        return pixmap.width() * pixmap.height() * max(pixmap.depth(), 8) // 8
+
+    def get(self, key):
+        """Возвращает растр или None, обновляя счетчики попаданий"""
+        entry = self._items.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._items.move_to_end(key)
+        return entry[0]
+
+    def find_nearest(self, page_num, zoom, rotation):
+        """Ищет растр той же страницы в другом масштабе (для мгновенного превью).
+
+        Возвращает (масштаб, QPixmap) или None; счетчики не меняет.
+        """
+        best = None
+        for (pn, z, rot), (pixmap, _) in self._items.items():
+            if pn == page_num and rot == rotation and z != zoom:
+                if best is None or abs(z - zoom) < abs(best[0] - zoom):
+                    best = (z, pixmap)
+        return best
+
+    def put(self, key, pixmap):
+        """Добавляет растр; слишком большие растры не кэшируются"""
+        size = self.pixmap_bytes(pixmap)
+        if key in self._items:
+            self.size_bytes -= self._items.pop(key)[1]
+        if size > self.budget_bytes:
+            return
+        self._items[key] = (pixmap, size)
+        self.size_bytes += size
+        self._evict()
+
+    def set_budget_mb(self, budget_mb):
+        self.budget_bytes = int(budget_mb * 1024 * 1024)
+        self._evict()
+
+    def clear(self):
+        self._items.clear()
+        self.size_bytes = 0
+
+    def _evict(self):
+        while self.size_bytes > self.budget_bytes and self._items:
+            _, (_, size) = self._items.popitem(last=False)
+            self.size_bytes -= size
+
+    def stats(self):
+        """Краткая статистика для отчета --startup-timing"""
+        total = self.hits + self.misses
+        ratio = (self.hits / total * 100) if total else 0.0
+        return (f"Кэш: {len(self._items)} стр., {self.size_bytes / (1024 * 1024):.1f} МБ, "
+                f"попаданий {self.hits}/{total} ({ratio:.0f}%)")
+
+class ContinuousLayout:
+    """Раскладка всех страниц документа в одну вертикальную ленту.
+
+    Хранит только геометрию страниц - растры создаются лишь для страниц
+    рядом с видимой областью, поэтому раскладка тысяч страниц мгновенна.
+    """
+    def __init__(self, page_sizes, zoom, rotation, spacing=10):
+        self.zoom = zoom
+        self.rotation = rotation
+        self.spacing = spacing
+        self.sizes = []   # (ширина, высота) каждой страницы на сцене
+        self.tops = []    # Верхняя граница каждой страницы на сцене
+
+        y = spacing
+        for width, height in page_sizes:
+            if rotation in (90, 270):
+                width, height = height, width
+            width, height = width * zoom, height * zoom
+            self.tops.append(y)
+            self.sizes.append((width, height))
+            y += height + spacing
+
+        self.width = max((w for w, _ in self.sizes), default=0) + 2 * spacing
+        self.height = y
+
+    def page_rect(self, page_num):
+        width, height = self.sizes[page_num]
+        return QRectF((self.width - width) / 2, self.tops[page_num], width, height)
+
+    def page_at(self, y):
+        """Номер страницы, на которую приходится координата y сцены"""
+        index = bisect.bisect_right(self.tops, y) - 1
+        return max(0, min(index, len(self.tops) - 1))
+
+    def pages_between(self, top, bottom):
+        if not self.tops:
+            return range(0)
+        return range(self.page_at(top), self.page_at(bottom) + 1)
+
+class PageRenderService(QObject):
+    """Очередь растеризации документа с предзагрузкой соседних страниц.
+
+    Сами страницы растеризуются в общем RenderProcessPool приложения:
+    PyMuPDF держит GIL во время get_pixmap, и в потоке GUI бы замирал.
+    Рабочие потоки сервиса только разбирают очередь, ждут процессы и
+    отдают готовые изображения сигналом.
+    """
+    page_rendered = pyqtSignal(int, float, int, QImage)  # страница, масштаб, поворот, изображение
+    tile_rendered = pyqtSignal(object, QImage)           # (страница, масштаб, поворот, col, row), изображение
+    layers_ready = pyqtSignal(int, object, object)       # страница, PageTextLayout, PageLinkLayer
+
+    def __init__(self, pool, file_path, workers=2, prefetch=2, tile_size=512, neighbor_zoom=0.5):
+        super().__init__()
+        self.pool = pool  # RenderProcessPool приложения
+        self.file_path = file_path
+        self.prefetch = prefetch
+        self.tile_size = tile_size
+        self.neighbor_zoom = neighbor_zoom  # Масштаб соседних страниц в режиме плиток
+
+        self._cond = threading.Condition()
+        self._jobs = []             # Очередь заданий (page, zoom, rotation) по приоритету
+        self._layer_jobs = []       # Страницы, для которых нужны текст и ссылки
+        self._in_progress = set()   # Задания, которые сейчас рендерятся
+        self._closed = False
+
+        self._threads = []
+        for i in range(max(1, workers)):
+            thread = threading.Thread(target=self._worker_loop, name=f"render-{i}")
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+
+    def request(self, page_num, zoom, rotation, page_count, direction=0, skip=None,
+                preview_zoom=None, tiles=None):
+        """Ставит в очередь текущую страницу и соседние в направлении листания.
+
+        Незавершенные задания от предыдущих запросов отбрасываются.
+        skip(key) -> True для страниц, которые уже есть у вызывающего.
+        preview_zoom - масштаб быстрого превью, которое рендерится первым.
+        tiles - список (col, row): вместо целой страницы рендерятся только
+        эти плитки, а соседние страницы готовятся в масштабе neighbor_zoom
+        (целая страница в масштабе плиток не влезла бы в кэш растров).
+        """
+        pages = [page_num]
+        ahead = [page_num + i for i in range(1, self.prefetch + 1)]
+        behind = [page_num - i for i in range(1, self.prefetch + 1)]
+        if direction < 0:
+            ahead, behind = behind, ahead
+        if direction == 0:
+            # Без направления - чередуем страницы вперед и назад
+            for a, b in zip(ahead, behind):
+                pages.extend([a, b])
+        else:
+            pages.extend(ahead)
+            pages.extend(behind[:max(1, self.prefetch // 2)])
+
+        jobs = []
+        if preview_zoom is not None and preview_zoom < zoom:
+            preview_key = (page_num, preview_zoom, rotation)
+            if not (skip and skip(preview_key)):
+                jobs.append(preview_key)
+        if tiles is not None:
+            jobs.extend((page_num, zoom, rotation, col, row) for col, row in tiles
+                        if not (skip and skip((page_num, zoom, rotation, col, row))))
+            pages = pages[1:]
+            zoom = min(zoom, self.neighbor_zoom)
+        for pn in pages:
+            if not 0 <= pn < page_count:
+                continue
+            key = (pn, zoom, rotation)
+            if skip and skip(key):
+                continue
+            jobs.append(key)
+
+        self.request_keys(jobs)
+
+    def request_keys(self, jobs):
+        """Заменяет очередь готовым списком заданий (по убыванию приоритета)"""
+        with self._cond:
+            self._jobs = [job for job in jobs if job not in self._in_progress]
+            self._cond.notify_all()
+
+    def request_layers(self, page_num):
+        """Ставит в очередь извлечение текста и ссылок страницы.
+
+        Эти задания берутся раньше растров: они быстрые, а без них не
+        работают выделение текста и наведение на ссылки.
+        """
+        with self._cond:
+            if page_num not in self._layer_jobs and ('layers', page_num) not in self._in_progress:
+                self._layer_jobs.append(page_num)
+                self._cond.notify()
+
+    def shutdown(self, wait=False):
+        """Останавливает рабочие потоки и закрывает файл в процессах пула;
+        wait - дождаться, пока файл будет закрыт"""
+        with self._cond:
+            self._closed = True
+            self._jobs = []
+            self._layer_jobs = []
+            self._cond.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+            self.pool.close_document(self.file_path)
+        else:
+            threading.Thread(target=self.pool.close_document, args=(self.file_path,),
+                             name="render-close", daemon=True).start()
+
+    def _worker_loop(self):
+        while True:
+            with self._cond:
+                while not self._jobs and not self._layer_jobs and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    break
+                if self._layer_jobs:
+                    job = ('layers', self._layer_jobs.pop(0))
+                else:
+                    job = self._jobs.pop(0)
+                self._in_progress.add(job)
+
+            if job[0] == 'layers':
+                try:
+                    self._extract_layers(job[1])
+                finally:
+                    with self._cond:
+                        self._in_progress.discard(job)
+                continue
+
+            page_num, zoom, rotation = job[:3]
+            tile = job[3:] if len(job) == 5 else None
+            image = None
+            try:
+                samples = self.pool.render(self.file_path, page_num, zoom, rotation, tile, self.tile_size)
+                image = image_from_samples(*samples)
+            except Exception as e:
+                if not self._closed:  # При закрытии пул прерывает начатые задания
+                    print(f"Ошибка рендеринга страницы {page_num + 1}: {e}")
+            finally:
+                with self._cond:
+                    self._in_progress.discard(job)
+
+            if image is None or self._closed:
+                continue
+            if tile is not None:
+                self.tile_rendered.emit(job, image)
+            else:
+                self.page_rendered.emit(page_num, zoom, rotation, image)
+
+    def _extract_layers(self, page_num):
+        try:
+            spans, links = self.pool.layers(self.file_path, page_num)
+            text_layout, link_layer = PageTextLayout(spans=spans), PageLinkLayer(links=links)
+        except Exception as e:
+            print(f"Ошибка извлечения текста страницы {page_num + 1}: {e}")
+            return
+        if not self._closed:
+            self.layers_ready.emit(page_num, text_layout, link_layer)
+
+# ============================================================================
+# ТЕКСТ И ССЫЛКИ СТРАНИЦ
+# ============================================================================
+class SpatialGridIndex:
+    """Равномерная сетка над прямоугольниками для быстрых запросов
+    по области и по точке (выделение текста, наведение на ссылки).
+
+    Строится один раз; запрос просматривает только ячейки, которые
+    пересекает область, а не все прямоугольники страницы.
+    """
+    def __init__(self, rects, cell_size=None):
+        self.rects = [tuple(r) for r in rects]  # (x0, y0, x1, y1)
+        self._cells = {}
+
+        if not self.rects:
+            self.cell_size = 1.0
+            return
+        if cell_size is None:
+            # Ячейка примерно под средний размер прямоугольника
+            avg_w = sum(r[2] - r[0] for r in self.rects) / len(self.rects)
+            avg_h = sum(r[3] - r[1] for r in self.rects) / len(self.rects)
+            cell_size = min(max(avg_w, avg_h, 8.0), 200.0)
+        self.cell_size = cell_size
+
+        for index, rect in enumerate(self.rects):
+            for cell in self._cells_for(rect):
+                self._cells.setdefault(cell, []).append(index)
+
+    def _cells_for(self, rect):
+        size = self.cell_size
+        x0, y0 = int(rect[0] // size), int(rect[1] // size)
+        x1, y1 = int(rect[2] // size), int(rect[3] // size)
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                yield (cx, cy)
+
+    def query_rect(self, rect):
+        """Индексы прямоугольников, пересекающих rect, в исходном порядке"""
+        qx0, qy0, qx1, qy1 = tuple(rect)
+        found = set()
+        rects = self.rects
+        for cell in self._cells_for((qx0, qy0, qx1, qy1)):
+            for index in self._cells.get(cell, ()):
+                if index in found:
+                    continue
+                x0, y0, x1, y1 = rects[index]
+                if x0 < qx1 and qx0 < x1 and y0 < qy1 and qy0 < y1:
+                    found.add(index)
+        return sorted(found)
+
+    def query_point(self, x, y):
+        """Индексы прямоугольников, содержащих точку"""
+        size = self.cell_size
+        cell = (int(x // size), int(y // size))
+        return [index for index in self._cells.get(cell, ())
+                if self.rects[index][0] <= x <= self.rects[index][2]
+                and self.rects[index][1] <= y <= self.rects[index][3]]
+
+def parse_link(link):
+    """Приводит ссылку из page.get_links() к словарю просмотрщика или None"""
+    if 'uri' in link:  # Это внешняя ссылка
+        return {
+            'rect': fitz.Rect(link['from']),
+            'uri': link['uri'],
+            'type': 'external'
+        }
+    if link.get('page', -1) >= 0 and 'file' not in link:  # Внутренняя ссылка на страницу
+        to = link.get('to')
+        return {
+            'rect': fitz.Rect(link['from']),
+            'page': link['page'],
+            'to': fitz.Point(to) if to is not None else None,
+            'type': 'internal'
+        }
+    return None
+
+class PageLinkLayer:
+    """Ссылки страницы в координатах PDF с пространственным индексом.
+
+    Общий источник для наведения, клика и подсказок: поиск ссылки под
+    курсором не перебирает все ссылки страницы.
+    """
+    def __init__(self, page=None, links=None):
+        """page - страница fitz; links - готовые page_links из процесса рендеринга"""
+        self.links = []  # {'rect', 'type': 'external' + 'uri' | 'internal' + 'page', 'to'}
+        try:
+            for link in (page.get_links() if links is None else links):
+                parsed = parse_link(link)
+                if parsed:
+                    self.links.append(parsed)
+        except Exception as e:
+            print(f"Ошибка при извлечении ссылок: {e}")
+        self.index = SpatialGridIndex(link['rect'] for link in self.links)
+
+    def __len__(self):
+        return len(self.links)
+
+    def link_at(self, point):
+        """Ссылка, содержащая точку PDF (верхняя из перекрывающихся), или None"""
+        hits = self.index.query_point(point.x, point.y)
+        return self.links[hits[-1]] if hits else None
+
+class DocumentLinkGraph(QObject):
+    """Граф внутренних ссылок документа: (страница, прямоугольник) -> (страница, точка).
+
+    Строится один раз по запросу в фоновом потоке с собственным
+    fitz.Document; после этого вопрос "что ссылается на страницу"
+    отвечается без повторных вызовов get_links(). Если построение не
+    удалось, следующий запрос строит граф заново.
+    """
+    built = pyqtSignal()
+    failed = pyqtSignal(str)
+
+    def __init__(self, file_path):
+        super().__init__()
+        self.file_path = file_path
+        self.is_built = False
+        self._incoming = {}  # целевая страница -> [(страница-источник, ссылка)]
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    def build(self):
+        """Запускает построение графа (повторные вызовы во время построения
+        и после него игнорируются)"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._build)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self, wait=False):
+        self._stop_event.set()
+        if wait and self._thread is not None:
+            self._thread.join()
+
+    def _build(self):
+        incoming = {}
+        try:
+            document = fitz.open(self.file_path)
+            try:
+                for page_num in range(document.page_count):
+                    if self._stop_event.is_set():
+                        return
+                    for link in document.load_page(page_num).get_links():
+                        parsed = parse_link(link)
+                        if parsed and parsed['type'] == 'internal':
+                            incoming.setdefault(parsed['page'], []).append((page_num, parsed))
+            finally:
+                document.close()
+        except Exception as e:
+            print(f"Ошибка при построении графа ссылок: {e}")
+            self._thread = None  # Неполный граф не запоминаем - следующий запрос повторит
+            self.failed.emit(str(e))
+            return
+        self._incoming = incoming
+        self.is_built = True
+        self.built.emit()
+
+    def links_to(self, page_num):
+        """[(страница-источник, ссылка)] - ссылки, ведущие на страницу,
+        по возрастанию страниц-источников (в порядке построения)"""
+        return list(self._incoming.get(page_num, []))
+
+class PageTextLayout:
+    """Спаны текста страницы с прямоугольниками в координатах PDF.
+
+    Извлекается один раз на страницу; масштаб и поворот применяются
+    только при запросе, поэтому смена масштаба не требует get_text.
+    """
+    def __init__(self, page=None, spans=None):
+        """page - страница fitz; spans - готовые page_text_spans из процесса рендеринга"""
+        self._index = None
+        if spans is None:
+            try:
+                spans = page_text_spans(page)
+            except Exception as e:
+                print(f"Ошибка при извлечении текста: {e}")
+                spans = []
+        self.spans = [(text, fitz.Rect(bbox)) for text, bbox in spans]  # (текст, fitz.Rect)
+
+    def __len__(self):
+        return len(self.spans)
+
+    @property
+    def index(self):
+        """Пространственный индекс спанов (строится при первом запросе)"""
+        if self._index is None:
+            self._index = SpatialGridIndex(bbox for _, bbox in self.spans)
+        return self._index
+
+    def text_in_rect(self, rect):
+        """Текст спанов, пересекающих прямоугольник (координаты PDF)"""
+        parts = [self.spans[i][0] for i in self.index.query_rect(rect)]
+        return ' '.join(parts).strip()
+
+class PageLayerCache:
+    """Текстовые слои и слои ссылок страниц всех вкладок под общим бюджетом.
+
+    Ключ - (вкладка, страница). Слои хранятся в координатах PDF и не
+    зависят от масштаба, поэтому переживают и смену масштаба, и уход
+    вкладки в фон; при превышении бюджета вытесняются давно не нужные
+    страницы любой вкладки. Размер слоя оценивается по числу спанов и ссылок.
+    """
+    SPAN_BYTES = 300   # Текст спана, fitz.Rect и ячейки пространственного индекса
+    LINK_BYTES = 400
+    
+    def __init__(self, budget_mb=64):
+        self.budget_bytes = int(budget_mb * 1024 * 1024)
+        self.size_bytes = 0
+        self._items = OrderedDict()  # (вкладка, страница) -> (PageTextLayout, PageLinkLayer, размер)
+    
+    def __len__(self):
+        return len(self._items)
+    
+    def get(self, owner, page_num):
+        """(PageTextLayout, PageLinkLayer) или None"""
+        entry = self._items.get((owner, page_num))
+        if entry is None:
+            return None
+        self._items.move_to_end((owner, page_num))
+        return entry[:2]
+    
+    def put(self, owner, page_num, text_layout, link_layer):
+        key = (owner, page_num)
+        if key in self._items:
+            self.size_bytes -= self._items.pop(key)[2]
+        size = 1024 + len(text_layout) * self.SPAN_BYTES + len(link_layer.links) * self.LINK_BYTES
+        self._items[key] = (text_layout, link_layer, size)
+        self.size_bytes += size
+        while self.size_bytes > self.budget_bytes and len(self._items) > 1:
+            _, (_, _, evicted) = self._items.popitem(last=False)
+            self.size_bytes -= evicted
+    
+    def drop(self, owner):
+        """Удаляет слои закрытой вкладки"""
+        for key in [key for key in self._items if key[0] is owner]:
+            self.size_bytes -= self._items.pop(key)[2]
+
+# ============================================================================
+# ОТКРЫТИЕ ДОКУМЕНТОВ В ФОНЕ
+# ============================================================================
+
+STARTXREF = re.compile(rb'startxref\s+(\d+)')
+XREF_START = re.compile(rb'\s*(xref|\d+\s+\d+\s+obj)')
+
+def pdf_needs_repair(file_path, tail_size=4096):
+    """Быстрая проверка по хвосту файла: последний startxref должен
+    указывать на таблицу xref или на поток xref ("N M obj"). Иначе MuPDF
+    при открытии восстанавливает файл, сканируя его целиком.
+    Не-PDF и нечитаемые файлы оставляем на fitz.open (он сообщит ошибку)."""
+    try:
+        with open(file_path, 'rb') as f:
+            if b'%PDF' not in f.read(1024):
+                return False
+            size = f.seek(0, os.SEEK_END)
+            f.seek(max(0, size - tail_size))
+            offsets = STARTXREF.findall(f.read())
+            if not offsets or int(offsets[-1]) >= size:
+                return True
+            f.seek(int(offsets[-1]))
+            return not XREF_START.match(f.read(64))
+    except OSError:
+        return False
+
+class DocumentOpener(QObject):
+    """Открытие PDF в фоновом потоке с прогрессом и отменой.
+
+    Исправный файл открывается прямо в потоке: MuPDF читает его лениво,
+    и первая страница доступна сразу. Поврежденный файл восстанавливает
+    отдельный процесс, а открывается уже его исправная копия - ее же
+    открывают процессы рендеринга и поиска. Копии хранятся в кэше под
+    хэшем исходного файла: повторное открытие не восстанавливает заново.
+    
+    opened приходит сразу после fitz.open с оценкой размеров (все страницы
+    как первая); настоящие размеры поток затем читает из своего экземпляра
+    документа и присылает сигналом page_sizes_ready.
+    """
+    progress = pyqtSignal(str, int, int)  # этап, сделано, всего (0 - неизвестно)
+    opened = pyqtSignal(object)           # {'document', 'page_sizes', 'source_path', 'repaired_copy'}
+    page_sizes_ready = pyqtSignal(list)   # [(ширина, высота)] всех страниц
+    failed = pyqtSignal(str)
+    
+    REPAIRED_COPIES = 10  # Сколько исправных копий хранит кэш
+    
+    def __init__(self, file_path):
+        super().__init__()
+        self.file_path = file_path
+        self.cancelled = threading.Event()
+        self.process = None
+        self.thread = None
+    
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name="open-document", daemon=True)
+        self.thread.start()
+    
+    def cancel(self):
+        """Результат отмененного открытия выбрасывается; восстановление прерывается"""
+        self.cancelled.set()
+        process = self.process
+        if process is not None and process.is_alive():
+            process.terminate()
+    
+    @staticmethod
+    def discard(result):
+        """Закрывает документ, который больше не нужен (исправная копия
+        остается в кэше)"""
+        if result.get('document'):
+            result['document'].close()
+    
+    @staticmethod
+    def repaired_directory():
+        base = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.GenericCacheLocation)
+        return os.path.join(base, "DeeRTuund", "RuundPDF", "repaired")
+    
+    def _run(self):
+        result = {'document': None, 'page_sizes': [], 'source_path': self.file_path, 'repaired_copy': None}
+        try:
+            if pdf_needs_repair(self.file_path):
+                self.progress.emit("Восстановление поврежденного файла", 0, 0)
+                result['repaired_copy'] = self._repair()
+                result['source_path'] = result['repaired_copy']
+            if self.cancelled.is_set():
+                self.discard(result)
+                return
+            
+            self.progress.emit("Открытие файла", 0, 0)
+            document = fitz.open(result['source_path'])
+            result['document'] = document
+            if document.page_count:
+                result['page_sizes'] = [self.page_size(document, 0)] * document.page_count
+            
+            if self.cancelled.is_set():
+                self.discard(result)
+                return
+            self.opened.emit(result)
+        except Exception as e:
+            self.discard(result)
+            if not self.cancelled.is_set():
+                self.failed.emit(str(e))
+            return
+        
+        # Документ отдан окну - размеры читаем из своего экземпляра
+        try:
+            with fitz.open(result['source_path']) as document:
+                sizes = []
+                for page_num in range(document.page_count):
+                    if self.cancelled.is_set():
+                        return
+                    sizes.append(self.page_size(document, page_num))
+                    if page_num % 100 == 99:
+                        time.sleep(0)  # Уступаем GIL интерфейсу
+            self.page_sizes_ready.emit(sizes)
+        except Exception as e:
+            print(f"Не удалось прочитать размеры страниц: {e}")
+    
+    @staticmethod
+    def page_size(document, page_num):
+        """Размер страницы без ее загрузки (уточняется при рендеринге)"""
+        try:
+            rect = document.page_cropbox(page_num)
+        except AttributeError:
+            rect = document.load_page(page_num).rect
+        return (rect.width, rect.height)
+    
+    def _repair(self):
+        """Путь исправной копии: из кэша или восстановленной сейчас"""
+        import multiprocessing
+        import tempfile
+        directory = self.repaired_directory()
+        os.makedirs(directory, exist_ok=True)
+        copy_path = os.path.join(directory, document_fingerprint(self.file_path) + ".pdf")
+        if os.path.exists(copy_path):
+            os.utime(copy_path)  # Копия снова нужна - последней в очереди на удаление
+            return copy_path
+        
+        # Процесс пишет во временный файл рядом: в кэш попадает только готовая копия
+        fd, part_path = tempfile.mkstemp(prefix="repair-", suffix=".part", dir=directory)
+        os.close(fd)
+        context = multiprocessing.get_context("spawn")
+        self.process = context.Process(target=repair_pdf_in_process,
+                                       args=(self.file_path, part_path), daemon=True)
+        with light_spawn():
+            self.process.start()
+        if self.cancelled.is_set():
+            self.process.terminate()
+        self.process.join()
+        if self.process.exitcode != 0:
+            try:
+                os.remove(part_path)
+            except OSError:
+                pass
+            if self.cancelled.is_set():
+                return None
+            raise RuntimeError("файл поврежден и не может быть восстановлен")
+        os.replace(part_path, copy_path)
+        self._evict_repaired(directory, keep=copy_path)
+        return copy_path
+    
+    @classmethod
+    def _evict_repaired(cls, directory, keep):
+        """Оставляет в кэше REPAIRED_COPIES копий, открытых последними"""
+        copies = []
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if name.endswith(".pdf") and path != keep:
+                try:
+                    copies.append((os.stat(path).st_mtime, path))
+                except OSError:
+                    pass
+        copies.sort(reverse=True)
+        for _, path in copies[cls.REPAIRED_COPIES - 1:]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass  # Открыта другим экземпляром приложения
+
+# ============================================================================
+# ВКЛАДКИ ДОКУМЕНТОВ
+# ============================================================================
+
+class DocumentTab:
+    """Состояние одного открытого документа (вкладки окна).
+    
+    Сцена, view и кэши растров общие для окна и заняты активной вкладкой:
+    фоновая вкладка растров не держит. Свои у вкладки документ, положение,
+    потоки рендеринга (в фоне простаивают), результаты и индекс поиска,
+    граф ссылок и история переходов; слои текста и ссылок страниц лежат
+    в общем PageLayerCache окна.
+    """
+    def __init__(self):
+        self.document = None
+        self.file_path = None
+        self.source_path = None       # Что открывают фоновые потоки: сам файл или восстановленная копия
+        self.repaired_copy = None     # Исправная копия поврежденного файла (из кэша)
+        self.opener = None            # DocumentOpener, пока он уточняет размеры страниц
+        self.current_page_num = 0
+        self.zoom_factor = 1.0
+        self.pending_zoom = 1.0  # Масштаб со слайдера, еще не отрендеренный
+        self.rotation_angle = 0
+        self.scroll = None            # (x, y) прокрутки view, пока вкладка в фоне
+        self.page_sizes = []          # Размеры страниц в пунктах (без масштаба)
+        self.search_dialog = None     # Свой диалог и результаты поиска у каждой вкладки
+        self.search_index = None      # SearchIndex документа
+        self.page_text_cache = None   # PageTextCache для расширенного поиска
+        self.render_service = None    # PageRenderService документа (живет, пока открыта вкладка)
+        self.link_graph = None        # DocumentLinkGraph (строится по запросу)
+        self.links_here_requested = False
+        self.history_back = []        # Страницы для "Вернуться"
+        self.history_forward = []     # Страницы для "Вперед по истории"
+    
+    def close(self):
+        """Останавливает фоновые задачи вкладки и закрывает документ"""
+        # Фоновые задачи не ждем: исправная копия остается в кэше, и
+        # удалять после них нечего
+        if self.opener:
+            self.opener.cancel()
+            self.opener = None
+        if self.render_service:
+            self.render_service.shutdown()
+            self.render_service = None
+        if self.search_dialog:
+            self.search_dialog.shutdown()
+            self.search_dialog.deleteLater()
+            self.search_dialog = None
+        if self.search_index:
+            self.search_index.stop()
+            self.search_index = None
+        if self.link_graph:
+            self.link_graph.stop()
+            self.link_graph = None
+        DocumentOpener.discard({'document': self.document, 'repaired_copy': self.repaired_copy})
+        self.document = None
+        self.repaired_copy = None
+
+def tab_state(name):
+    """Атрибут окна, который хранится в активной вкладке (DocumentTab)"""
+    return property(lambda self: getattr(self.tab, name),
+                    lambda self, value: setattr(self.tab, name, value))
+
+# ============================================================================
+# ЕДИНСТВЕННЫЙ ЭКЗЕМПЛЯР ПРИЛОЖЕНИЯ
+# ============================================================================
+
+class SingleInstance(QObject):
+    """Локальный сервер первого запущенного экземпляра.
+    
+    Повторный запуск (двойной клик по PDF) не создает новый процесс с окном,
+    а передает путь уже работающему экземпляру через QLocalSocket и
+    завершается. Сообщение - путь к файлу в UTF-8 и перевод строки; пустая
+    строка означает "просто показать окно".
+    """
+    file_received = pyqtSignal(str)
+    
+    CONNECT_TIMEOUT_MS = 500
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.server = None
+        self.buffers = {}  # сокет -> принятые байты
+    
+    @staticmethod
+    def server_name():
+        # Имя свое для каждого пользователя: на Windows именованные каналы
+        # общие для всех сеансов
+        user = os.path.expanduser("~").encode("utf-8", "replace")
+        return "RuundPDF-" + hashlib.md5(user).hexdigest()[:12]
+    
+    @classmethod
+    def send_to_running(cls, file_path):
+        """Передает путь работающему экземпляру. False - экземпляра нет"""
+        from PyQt6.QtNetwork import QLocalSocket
+        socket = QLocalSocket()
+        socket.connectToServer(cls.server_name())
+        if not socket.waitForConnected(cls.CONNECT_TIMEOUT_MS):
+            return False
+        socket.write(((file_path or "") + "\n").encode("utf-8"))
+        # flush() обычно пишет сразу все; ждем только если что-то осталось
+        socket.flush()
+        while socket.bytesToWrite() and socket.waitForBytesWritten(cls.CONNECT_TIMEOUT_MS):
+            pass
+        sent = socket.bytesToWrite() == 0
+        socket.disconnectFromServer()
+        if socket.state() != QLocalSocket.LocalSocketState.UnconnectedState:
+            socket.waitForDisconnected(cls.CONNECT_TIMEOUT_MS)
+        return sent
+    
+    @classmethod
+    def is_running(cls):
+        """Отвечает ли на сокете другой экземпляр"""
+        from PyQt6.QtNetwork import QLocalSocket
+        socket = QLocalSocket()
+        socket.connectToServer(cls.server_name())
+        if not socket.waitForConnected(cls.CONNECT_TIMEOUT_MS):
+            return False
+        socket.disconnectFromServer()
+        return True
+    
+    def listen(self):
+        """Начинает принимать пути от следующих запусков.
+        
+        False - сервер не открыт; если при этом is_running(), другой
+        экземпляр запустился одновременно с нами и уже слушает.
+        """
+        from PyQt6.QtNetwork import QLocalServer
+        name = self.server_name()
+        self.server = QLocalServer(self)
+        self.server.newConnection.connect(self._on_new_connection)
+        if self.server.listen(name):
+            return True
+        if self.is_running():
+            # Сокет живой - его нельзя удалять, иначе работающий экземпляр
+            # перестанет получать файлы
+            self.server = None
+            return False
+        # Никто не отвечает: сокет остался от упавшего процесса
+        QLocalServer.removeServer(name)
+        if self.server.listen(name):
+            return True
+        print(f"Не удалось открыть локальный сервер: {self.server.errorString()}")
+        self.server = None
+        return False
+    
+    def close(self):
+        if self.server:
+            self.server.close()
+            self.server = None
+    
+    def _on_new_connection(self):
+        while self.server and self.server.hasPendingConnections():
+            socket = self.server.nextPendingConnection()
+            self.buffers[socket] = b""
+            socket.readyRead.connect(lambda s=socket: self._on_ready_read(s))
+            socket.disconnected.connect(lambda s=socket: self._on_disconnected(s))
+            # Данные могли прийти вместе с подключением
+            self._on_ready_read(socket)
+    
+    def _on_ready_read(self, socket):
+        self.buffers[socket] = self.buffers.get(socket, b"") + bytes(socket.readAll())
+        *lines, rest = self.buffers[socket].split(b"\n")
+        self.buffers[socket] = rest
+        for line in lines:
+            self.file_received.emit(line.decode("utf-8", "replace"))
+    
+    def _on_disconnected(self, socket):
+        self.buffers.pop(socket, None)
+        socket.deleteLater()
+
 # ============================================================================
 # ОСНОВНОЙ КЛАСС ПРИЛОЖЕНИЯ С АКТИВНЫМИ ССЫЛКАМИ
 # ============================================================================
@@ -1257,6 +3737,25 @@ class PDFViewerApp(QMainWindow):
     # Сигнал изменения текущей страницы
     current_page_changed = pyqtSignal(int)
     
+    # Состояние документа живет во вкладке; методы окна работают
+    # с активной вкладкой через эти свойства
+    document = tab_state('document')
+    file_path = tab_state('file_path')
+    source_path = tab_state('source_path')
+    current_page_num = tab_state('current_page_num')
+    zoom_factor = tab_state('zoom_factor')
+    pending_zoom = tab_state('pending_zoom')
+    rotation_angle = tab_state('rotation_angle')
+    page_sizes = tab_state('page_sizes')
+    search_dialog = tab_state('search_dialog')
+    search_index = tab_state('search_index')
+    page_text_cache = tab_state('page_text_cache')
+    render_service = tab_state('render_service')
+    link_graph = tab_state('link_graph')
+    links_here_requested = tab_state('links_here_requested')
+    history_back = tab_state('history_back')
+    history_forward = tab_state('history_forward')
+    
     def __init__(self, file_to_open=None):
         super().__init__()
         self.setWindowTitle("RuundPDF v3.0.1 - PDF Reader с активными ссылками")
@@ -1273,29 +3772,58 @@ class PDFViewerApp(QMainWindow):
         self.setAcceptDrops(True)
         
         # Инициализация переменных
-        self.document = None
-        self.file_path = None
-        self.current_page_num = 0
-        self.zoom_factor = 1.0
-        self.rotation_angle = 0
+        self.tab = DocumentTab()      # Активная вкладка (пустая, пока нет документов)
         self.bookmarks = {}
         self.tts_player = None
-        self.search_dialog = None
         self.is_text_select_mode = True
         self.selection_start = None
         self.selection_end = None
         self.selection_rect = None
-        self.text_blocks = []
+        self.text_layout = None       # PageTextLayout текущей страницы
+        self.page_matrix = fitz.Matrix(1, 1)  # PDF -> пиксели растра текущей страницы
         self.page_pixmap = None
         self.selected_text = ""
         
-        self.search_highlights = []
-        self.current_search_highlight = None
+        # Фоновый рендеринг: сервис у каждой вкладки, кэши готовых растров
+        # общие (растры есть только у активной вкладки, бюджет общий)
+        self.page_direction = 0       # Направление листания: 1 вперед, -1 назад
+        settings = QSettings("DeeRTuund", "RuundPDF")
+        # Слои текста и ссылок страниц всех вкладок
+        self.layer_cache = PageLayerCache(settings.value("page_layer_cache_mb", 64, type=int))
+        self.pixmap_cache = PixmapCache(settings.value("render_cache_mb", 256, type=int))
+        # Прогрессивный рендеринг: сначала превью в малом масштабе, затем полный растр
+        self.preview_zoom = settings.value("render_preview_zoom", 0.5, type=float)
+        self.shown_render_key = None  # Ключ растра, который сейчас на экране
+        # Плиточный рендеринг видимой области при большом масштабе
+        self.tile_zoom_threshold = settings.value("render_tile_zoom", 2.0, type=float)
+        self.tile_size = settings.value("render_tile_size", 512, type=int)
+        self.tile_cache = PixmapCache(settings.value("render_tile_cache_mb", 128, type=int))
+        # Процессы растеризации общие для всех вкладок; стартуют сейчас и
+        # импортируют PyMuPDF, пока создается окно
+        self.render_pool = RenderProcessPool(settings.value("render_processes", 2, type=int))
+        # Пул поиска тоже один на приложение: процессы запускаются при первом
+        # большом поиске и завершаются после минуты простоя
+        self.search_pool = SharedProcessPool(
+            settings.value("search_processes", 0, type=int) or min(os.cpu_count() or 1, 4)
+        )
+        self.tile_items = {}  # (страница, масштаб, поворот, col, row) -> QGraphicsPixmapItem
+        # Непрерывная прокрутка: лента страниц, растры только у видимых
+        self.continuous_mode = settings.value("continuous_scroll", False, type=bool)
+        self.continuous_layout = None
+        self.continuous_items = {}      # страница -> QGraphicsPixmapItem
+        self.continuous_shown = {}      # страница -> ключ показанного растра
+        self.programmatic_scroll = None # Позиция прокрутки, выставленная программно
+        self.relayout_running = False   # Лента перестраивается (fix_page_size может вызваться снова)
+        self.relayout_pending = False
+        self.page_origin = QPointF(0, 0)  # Положение текущей страницы на сцене
+        
+        self.search_overlay = None  # SearchHighlightItem текущей страницы
         
         # Для активных ссылок
-        self.active_links = []  # Ссылки на текущей странице
+        self.link_layer = None        # PageLinkLayer текущей страницы
         
         self.file_to_open_on_start = file_to_open
+        self.pending_opens = []       # DocumentOpener файлов, которые еще открываются
         
         self.setup_ui()
         self.apply_styles()
@@ -1303,7 +3831,7 @@ class PDFViewerApp(QMainWindow):
         self.load_bookmarks()
         
         if self.file_to_open_on_start and os.path.exists(self.file_to_open_on_start):
-            QTimer.singleShot(100, lambda: self.open_file(self.file_to_open_on_start))
+            QTimer.singleShot(0, lambda: self.open_file(self.file_to_open_on_start))
     
     def load_bookmarks(self):
         try:
@@ -1390,6 +3918,12 @@ class PDFViewerApp(QMainWindow):
         self.action_rotate_right.triggered.connect(self.rotate_right)
         toolbar.addAction(self.action_rotate_right)
         
+        self.action_continuous = QAction(create_text_icon("📜"), "Непрерывная прокрутка", self)
+        self.action_continuous.setCheckable(True)
+        self.action_continuous.setChecked(self.continuous_mode)
+        self.action_continuous.toggled.connect(self.set_continuous_mode)
+        toolbar.addAction(self.action_continuous)
+        
         toolbar.addSeparator()
         
         self.action_speak = QAction(create_text_icon("🔊"), "Озвучить", self)
@@ -1430,6 +3964,48 @@ class PDFViewerApp(QMainWindow):
         self.action_manage_bookmarks.triggered.connect(self.manage_bookmarks)
         bookmarks_menu.addAction(self.action_manage_bookmarks)
         
+        navigation_menu = menubar.addMenu('&Навигация')
+        
+        self.action_history_back = QAction("Вернуться", self)
+        self.action_history_back.setShortcut("Alt+Left")
+        self.action_history_back.triggered.connect(self.history_go_back)
+        navigation_menu.addAction(self.action_history_back)
+        
+        self.action_history_forward = QAction("Вперед по истории", self)
+        self.action_history_forward.setShortcut("Alt+Right")
+        self.action_history_forward.triggered.connect(self.history_go_forward)
+        navigation_menu.addAction(self.action_history_forward)
+        
+        navigation_menu.addSeparator()
+        
+        self.action_links_here = QAction("Ссылки на эту страницу...", self)
+        self.action_links_here.triggered.connect(self.show_links_to_page)
+        navigation_menu.addAction(self.action_links_here)
+        
+        navigation_menu.addSeparator()
+        
+        self.action_next_tab = QAction("Следующая вкладка", self)
+        self.action_next_tab.setShortcut("Ctrl+Tab")
+        self.action_next_tab.triggered.connect(lambda: self.cycle_tabs(1))
+        navigation_menu.addAction(self.action_next_tab)
+        
+        self.action_prev_tab = QAction("Предыдущая вкладка", self)
+        self.action_prev_tab.setShortcut("Ctrl+Shift+Tab")
+        self.action_prev_tab.triggered.connect(lambda: self.cycle_tabs(-1))
+        navigation_menu.addAction(self.action_prev_tab)
+        
+        self.action_close_tab = QAction("Закрыть вкладку", self)
+        self.action_close_tab.setShortcut("Ctrl+W")
+        self.action_close_tab.triggered.connect(lambda: self.close_tab(self.tab_bar.currentIndex()))
+        navigation_menu.addAction(self.action_close_tab)
+        
+        speech_menu = menubar.addMenu('&Озвучка')
+        speech_menu.addAction(self.action_speak)
+        
+        self.action_export_audiobook = QAction("Экспорт аудиокниги...", self)
+        self.action_export_audiobook.triggered.connect(self.show_audiobook_export)
+        speech_menu.addAction(self.action_export_audiobook)
+        
         # Основной виджет
         central_widget = QWidget()
         central_widget.setAcceptDrops(True)
@@ -1448,12 +4024,31 @@ class PDFViewerApp(QMainWindow):
         self.zoom_slider.setValue(100)
         self.zoom_slider.valueChanged.connect(self.change_zoom)
         self.zoom_value_label = QLabel("100%")
+        
+        # Пока жест масштабирования не закончился, только растягиваем картинку
+        self.zoom_timer = QTimer(self)
+        self.zoom_timer.setSingleShot(True)
+        self.zoom_timer.setInterval(200)
+        self.zoom_timer.timeout.connect(self.on_zoom_settled)
         zoom_layout.addWidget(self.zoom_slider)
         zoom_layout.addWidget(self.zoom_value_label)
         main_layout.addLayout(zoom_layout)
         
+        # Вкладки документов; view и рендеринг общие, панель видна от двух вкладок
+        self.tab_bar = QTabBar()
+        self.tab_bar.setTabsClosable(True)
+        self.tab_bar.setMovable(True)
+        self.tab_bar.setDocumentMode(True)
+        self.tab_bar.setExpanding(False)
+        self.tab_bar.setAutoHide(True)
+        self.tab_bar.currentChanged.connect(self.on_tab_changed)
+        self.tab_bar.tabCloseRequested.connect(self.close_tab)
+        main_layout.addWidget(self.tab_bar)
+        
         # Поле просмотра
         self.scene = QGraphicsScene(self)
+        if self.continuous_mode:
+            self.scene.setBackgroundBrush(QBrush(QColor(200, 200, 200)))
         self.view = PDFGraphicsView(self.scene, self)
         self.view.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
         self.view.customContextMenuRequested.connect(self.show_context_menu)
@@ -1463,8 +4058,27 @@ class PDFViewerApp(QMainWindow):
         main_layout.addWidget(self.view)
         self.current_pixmap_item = None
         
+        # Догружаем плитки и страницы ленты при прокрутке (с небольшой задержкой)
+        self.viewport_timer = QTimer(self)
+        self.viewport_timer.setSingleShot(True)
+        self.viewport_timer.setInterval(30)
+        self.viewport_timer.timeout.connect(self.on_viewport_changed)
+        self.view.horizontalScrollBar().valueChanged.connect(lambda _: self.viewport_timer.start())
+        self.view.verticalScrollBar().valueChanged.connect(lambda _: self.viewport_timer.start())
+        
         self.status_bar = self.statusBar()
         self.status_bar.showMessage("Готово. Перетащите PDF файл в любое место окна.")
+        
+        # Индикатор фонового открытия файлов
+        self.open_progress = QProgressBar()
+        self.open_progress.setMaximumWidth(200)
+        self.open_progress.setTextVisible(False)
+        self.btn_cancel_open = QPushButton("Отмена")
+        self.btn_cancel_open.clicked.connect(self.cancel_open)
+        self.status_bar.addPermanentWidget(self.open_progress)
+        self.status_bar.addPermanentWidget(self.btn_cancel_open)
+        self.open_progress.hide()
+        self.btn_cancel_open.hide()
     
     def apply_styles(self):
         self.setStyleSheet("""
@@ -1487,7 +4101,9 @@ class PDFViewerApp(QMainWindow):
             self.action_rotate_right, self.action_speak, self.zoom_slider,
             self.action_save, self.action_print, self.action_add_bookmark,
             self.action_bookmark, self.action_toggle_cursor, self.action_goto,
-            self.action_search
+            self.action_search, self.action_history_back, self.action_history_forward,
+            self.action_links_here, self.action_export_audiobook,
+            self.action_close_tab
         ]
         for control in controls:
             control.setEnabled(False)
@@ -1498,7 +4114,9 @@ class PDFViewerApp(QMainWindow):
             self.action_rotate_right, self.action_speak, self.zoom_slider,
             self.action_save, self.action_print, self.action_add_bookmark,
             self.action_bookmark, self.action_toggle_cursor, self.action_goto,
-            self.action_search
+            self.action_search, self.action_history_back, self.action_history_forward,
+            self.action_links_here, self.action_export_audiobook,
+            self.action_close_tab
         ]
         for control in controls:
             control.setEnabled(True)
@@ -1545,27 +4163,38 @@ class PDFViewerApp(QMainWindow):
         self.search_dialog.raise_()
         self.search_dialog.activateWindow()
     
-    def highlight_search_result(self, rect, text):
-        for item in self.search_highlights:
-            self.scene.removeItem(item)
-        self.search_highlights.clear()
-        
-        if hasattr(rect, 'x0') and hasattr(rect, 'y0') and hasattr(rect, 'x1') and hasattr(rect, 'y1'):
-            highlight = QGraphicsRectItem(
-                rect.x0 * self.zoom_factor,
-                rect.y0 * self.zoom_factor,
-                (rect.x1 - rect.x0) * self.zoom_factor,
-                (rect.y1 - rect.y0) * self.zoom_factor
-            )
-            
-            highlight.setPen(QPen(Qt.PenStyle.NoPen))
-            highlight.setBrush(QBrush(QColor(255, 255, 0, 100)))
-            
-            self.scene.addItem(highlight)
-            self.search_highlights.append(highlight)
-            self.current_search_highlight = highlight
-            
-            self.status_bar.showMessage(f"Найден текст: '{text}'")
+    def highlight_search_result(self, dialog, row):
+        """Делает совпадение row текущим; страница перерисовывается только при смене страницы"""
+        if dialog is not self.search_dialog:
+            return  # Диалог фоновой вкладки - ее документ сейчас не на экране
+        page_num = dialog.search_results.page(row)
+        if page_num != self.current_page_num or self.search_overlay is None:
+            self.current_page_num = page_num
+            self.render_page()
+        else:
+            self.search_overlay.set_current_row(row)
+        
+        current = self.search_overlay.current_rect() if self.search_overlay else None
+        if current is not None:
+            self.view.ensureVisible(current, 50, 50)
+        self.status_bar.showMessage(f"Найден текст: '{dialog.search_text}'")
+    
+    def update_search_overlay(self):
+        """Перестраивает подсветку совпадений поиска на текущей странице"""
+        dialog = self.search_dialog
+        rows = dialog.search_results.rows_on_page(self.current_page_num) if dialog else range(0)
+        if not rows or not self.document:
+            if self.search_overlay is not None:
+                self.scene.removeItem(self.search_overlay)
+                self.search_overlay = None
+            return
+        
+        results = dialog.search_results
+        rects = [self.pdf_rect_to_scene(results.rect(row)) for row in rows]
+        if self.search_overlay is None:
+            self.search_overlay = SearchHighlightItem()
+            self.scene.addItem(self.search_overlay)
+        self.search_overlay.set_hits(rects, rows.start, dialog.current_result)
     
     def goto_page_dialog(self):
         if not self.document:
@@ -1588,65 +4217,325 @@ class PDFViewerApp(QMainWindow):
             file_path, _ = QFileDialog.getOpenFileName(self, "Открыть PDF", "", "PDF Files (*.pdf)")
         
         if file_path:
-            try:
-                self.document = fitz.open(file_path)
-                self.file_path = file_path
-                self.current_page_num = 0
-                self.rotation_angle = 0
-                self.zoom_slider.setValue(100)
-                self.render_page()
-                self.enable_controls()
-                self.setWindowTitle(f"RuundPDF v3.0.1 - {QFileInfo(file_path).fileName()} (активные ссылки)")
-                self.update_bookmarks_menu()
-                self.status_bar.showMessage(f"Загружен: {QFileInfo(file_path).fileName()}")
-                
-                if self.search_dialog:
-                    self.search_dialog.search_results.clear()
-                    self.search_dialog.results_list.clear()
-                
-                # Отправляем сигнал об изменении страницы
-                self.current_page_changed.emit(self.current_page_num)
-                
-            except Exception as e:
-                QMessageBox.critical(self, "Ошибка", f"Не удалось открыть файл: {e}")
+            # Уже открытый документ - просто переключаемся на его вкладку
+            index = self.find_tab(file_path)
+            if index >= 0:
+                self.tab_bar.setCurrentIndex(index)
+                return
+            
+            if any(self.find_tab(file_path, [opener.file_path]) >= 0 for opener in self.pending_opens):
+                return  # Уже открывается
+            
+            # fitz.open (и тем более восстановление поврежденного файла) - в фоне
+            opener = DocumentOpener(file_path)
+            opener.progress.connect(lambda stage, done, total, o=opener: self.on_open_progress(o, stage, done, total))
+            opener.opened.connect(lambda result, o=opener: self.on_document_opened(o, result))
+            opener.page_sizes_ready.connect(lambda sizes, o=opener: self.on_page_sizes_ready(o, sizes))
+            opener.failed.connect(lambda message, o=opener: self.on_open_failed(o, message))
+            self.pending_opens.append(opener)
+            self.on_open_progress(opener, "Открытие файла", 0, 0)
+            opener.start()
+    
+    def on_open_progress(self, opener, stage, done, total):
+        if opener not in self.pending_opens:
+            return
+        self.open_progress.setRange(0, total)
+        self.open_progress.setValue(done)
+        self.open_progress.show()
+        self.btn_cancel_open.show()
+        self.status_bar.showMessage(f"{stage}: {QFileInfo(opener.file_path).fileName()}")
+    
+    def finish_open(self, opener):
+        self.pending_opens.remove(opener)
+        if not self.pending_opens:
+            self.open_progress.hide()
+            self.btn_cancel_open.hide()
+    
+    def cancel_open(self):
+        """Отменяет открытие всех файлов, которые еще не открылись"""
+        if not self.pending_opens:
+            return
+        for opener in self.pending_opens:
+            opener.cancel()
+        self.pending_opens.clear()
+        self.open_progress.hide()
+        self.btn_cancel_open.hide()
+        self.status_bar.showMessage("Открытие файла отменено")
+    
+    def on_open_failed(self, opener, message):
+        if opener not in self.pending_opens:
+            return
+        self.finish_open(opener)
+        QMessageBox.critical(self, "Ошибка", f"Не удалось открыть файл: {message}")
+    
+    def on_document_opened(self, opener, result):
+        """Документ открыт в фоне: новая вкладка и первая страница.
+        Текст и ссылки страниц извлекаются потоками рендеринга, граф ссылок
+        и поисковый индекс строятся позже в своих потоках."""
+        if opener not in self.pending_opens:
+            DocumentOpener.discard(result)  # Открытие отменили, пока файл открывался
+            return
+        self.finish_open(opener)
+        startup_timing.mark("файл открыт")
+        file_path = opener.file_path
+        
+        # Новый документ открывается в новой вкладке, текущая уходит в фон
+        self.deactivate_tab()
+        self.tab = DocumentTab()
+        self.document = result['document']
+        self.file_path = file_path
+        self.source_path = result['source_path']
+        self.tab.repaired_copy = result['repaired_copy']
+        self.tab.opener = opener
+        self.page_sizes = result['page_sizes']
+        self.add_tab(self.tab)
+        
+        self.release_page_rasters()
+        self.start_render_service(self.source_path)
+        self.page_text_cache = PageTextCache()
+        self.rebalance_text_caches()
+        self.link_graph = DocumentLinkGraph(self.source_path)
+        self.link_graph.built.connect(self.on_link_graph_built)
+        self.link_graph.failed.connect(self.on_link_graph_failed)
+        self.start_search_index(self.source_path)
+        self.sync_zoom_slider()
+        self.render_page()
+        self.enable_controls()
+        self.update_window_title()
+        self.update_bookmarks_menu()
+        name = QFileInfo(file_path).fileName()
+        if self.tab.repaired_copy:
+            self.status_bar.showMessage(f"Загружен: {name} (файл был поврежден и восстановлен)")
+        else:
+            self.status_bar.showMessage(f"Загружен: {name}")
+        
+        # Отправляем сигнал об изменении страницы
+        self.current_page_changed.emit(self.current_page_num)
+    
+    def on_page_sizes_ready(self, opener, sizes):
+        """Настоящие размеры страниц вместо оценки, с которой открылась вкладка"""
+        tab = next((tab for tab in self.open_tabs() if tab.opener is opener), None)
+        if tab is None or len(sizes) != len(tab.page_sizes):
+            return
+        tab.opener = None
+        # Оценка - размер первой страницы; уже уточненные по растрам размеры не трогаем
+        estimate = sizes[0]
+        changed = False
+        for page_num, size in enumerate(sizes):
+            if tab.page_sizes[page_num] == estimate and size != estimate:
+                tab.page_sizes[page_num] = size
+                changed = True
+        if changed and tab is self.tab and self.continuous_layout is not None:
+            self.relayout_continuous()
+    
+    # ------------------------------------------------------------------
+    # Вкладки
+    # ------------------------------------------------------------------
+    def open_tabs(self):
+        return [self.tab_bar.tabData(i) for i in range(self.tab_bar.count())]
+    
+    def find_tab(self, file_path, paths=None):
+        """Индекс вкладки (или пути в paths) с этим файлом либо -1"""
+        def normalized(path):
+            return os.path.normcase(os.path.abspath(path))
+        target = normalized(file_path)
+        if paths is None:
+            paths = [tab.file_path for tab in self.open_tabs()]
+        for index, path in enumerate(paths):
+            if normalized(path) == target:
+                return index
+        return -1
+    
+    def add_tab(self, tab):
+        """Добавляет вкладку и делает ее текущей (без переключения документа)"""
+        self.tab_bar.blockSignals(True)
+        index = self.tab_bar.addTab(QFileInfo(tab.file_path).fileName())
+        self.tab_bar.setTabData(index, tab)
+        self.tab_bar.setTabToolTip(index, tab.file_path)
+        self.tab_bar.setCurrentIndex(index)
+        self.tab_bar.blockSignals(False)
+    
+    def update_window_title(self):
+        name = QFileInfo(self.file_path).fileName()
+        self.setWindowTitle(f"RuundPDF v3.0.1 - {name} (активные ссылки)")
+        index = self.tab_bar.currentIndex()
+        if index >= 0:
+            self.tab_bar.setTabText(index, name)
+            self.tab_bar.setTabToolTip(index, self.file_path)
+    
+    def sync_zoom_slider(self):
+        """Слайдер масштаба показывает масштаб активной вкладки"""
+        value = round(self.pending_zoom * 100)
+        self.zoom_slider.blockSignals(True)
+        self.zoom_slider.setValue(value)
+        self.zoom_slider.blockSignals(False)
+        self.zoom_value_label.setText(f"{value}%")
+    
+    def rebalance_text_caches(self):
+        """Бюджет посимвольных слоев поиска общий: делится поровну между вкладками"""
+        caches = [tab.page_text_cache for tab in self.open_tabs() if tab.page_text_cache]
+        if not caches:
+            return
+        total_mb = QSettings("DeeRTuund", "RuundPDF").value("search_text_cache_mb", 128, type=int)
+        for cache in caches:
+            cache.set_budget_mb(total_mb / len(caches))
+    
+    def on_tab_changed(self, index):
+        tab = self.tab_bar.tabData(index) if index >= 0 else None
+        if tab is None or tab is self.tab:
+            return
+        self.deactivate_tab()
+        self.tab = tab
+        self.activate_tab()
+    
+    def cycle_tabs(self, step):
+        count = self.tab_bar.count()
+        if count > 1:
+            self.tab_bar.setCurrentIndex((self.tab_bar.currentIndex() + step) % count)
+    
+    def deactivate_tab(self):
+        """Уводит активную вкладку в фон: запоминает положение и отдает
+        общие ресурсы; растры страниц рендерятся заново при возврате"""
+        if not self.document:
+            return
+        self.commit_pending_zoom()
+        self.tab.scroll = (self.view.horizontalScrollBar().value(),
+                           self.view.verticalScrollBar().value())
+        if self.search_dialog:
+            self.search_dialog.hide()
+        if self.tts_player:
+            # Плеер читает документ активной вкладки
+            self.tts_player.close()
+            self.tts_player = None
+        # Незавершенные растры фоновой вкладки больше не нужны
+        self.render_service.request_keys([])
+        self.clear_selection()
+    
+    def activate_tab(self):
+        """Показывает документ активной вкладки в общем view"""
+        self.release_page_rasters()
+        self.sync_zoom_slider()
+        self.render_page()
+        if self.tab.scroll is not None:
+            x, y = self.tab.scroll
+            self.view.horizontalScrollBar().setValue(x)
+            self.view.verticalScrollBar().setValue(y)
+            self.programmatic_scroll = self.view.verticalScrollBar().value()
+        self.enable_controls()
+        self.update_window_title()
+        self.status_bar.showMessage(f"Документ: {QFileInfo(self.file_path).fileName()}")
+    
+    def close_tab(self, index):
+        """Закрывает вкладку: документ, поиск и индекс освобождаются"""
+        tab = self.tab_bar.tabData(index) if index >= 0 else None
+        if tab is None:
+            return
+        if tab is self.tab:
+            self.deactivate_tab()
+            self.tab = DocumentTab()
+        tab.close()
+        self.layer_cache.drop(tab)
+        self.tab_bar.blockSignals(True)
+        self.tab_bar.removeTab(index)
+        self.tab_bar.blockSignals(False)
+        self.rebalance_text_caches()
+        
+        if self.tab_bar.count() == 0:
+            self.show_no_document()
+        elif not self.document:
+            self.tab = self.tab_bar.tabData(self.tab_bar.currentIndex())
+            self.activate_tab()
+    
+    def show_no_document(self):
+        """Пустое окно после закрытия последней вкладки"""
+        self.release_page_rasters()
+        if self.current_pixmap_item is not None:
+            self.current_pixmap_item.setPixmap(QPixmap())
+        self.page_pixmap = None
+        self.shown_render_key = None
+        self.view.setSceneRect(QRectF())
+        self.update_search_overlay()
+        self.link_layer = None
+        self.text_layout = None
+        self.sync_zoom_slider()
+        self.page_label.setText("Страница: --/--")
+        self.disable_controls()
+        self.setWindowTitle("RuundPDF v3.0.1 - PDF Reader с активными ссылками")
+        self.status_bar.showMessage("Готово. Перетащите PDF файл в любое место окна.")
+    
+    def start_search_index(self, file_path):
+        """Строит (или дополняет) постоянный поисковый индекс в фоне"""
+        if self.search_index:
+            self.search_index.stop()
+        settings = QSettings("DeeRTuund", "RuundPDF")
+        self.search_index = SearchIndex(file_path, self.document.page_count, self.file_path,
+                                        settings.value("search_index_max_mb", 512, type=int))
+        self.search_index.completed.connect(
+            lambda: self.status_bar.showMessage("Поисковый индекс документа готов", 3000)
+        )
+        # Даем сначала отрисоваться первой странице
+        index = self.search_index
+        QTimer.singleShot(1000, index.start_build)
+    
+    def start_render_service(self, file_path):
+        """Запускает фоновый рендеринг для документа новой вкладки"""
+        settings = QSettings("DeeRTuund", "RuundPDF")
+        workers = settings.value("render_workers", 2, type=int)
+        prefetch = settings.value("render_prefetch", 2, type=int)
+        
+        self.render_service = PageRenderService(self.render_pool, file_path, workers, prefetch,
+                                                self.tile_size, self.preview_zoom)
+        self.render_service.page_rendered.connect(self.on_page_rendered)
+        self.render_service.tile_rendered.connect(self.on_tile_rendered)
+        self.render_service.layers_ready.connect(self.on_layers_ready)
+    
+    def release_page_rasters(self):
+        """Освобождает растры прежнего документа (кэши растров общие для вкладок)"""
+        self.pixmap_cache.clear()
+        self.tile_cache.clear()
+        self.clear_tiles()
+        self.clear_continuous_items()
+        self.continuous_layout = None
+    
+    def render_key(self):
+        """Ключ растра текущей страницы"""
+        return (self.current_page_num, self.zoom_factor, self.rotation_angle)
     
     def render_page(self):
         if not self.document:
             return
         
-        for item in self.search_highlights:
-            self.scene.removeItem(item)
-        self.search_highlights.clear()
+        self.commit_pending_zoom()
         
         page = self.document.load_page(self.current_page_num)
-        matrix = fitz.Matrix(self.zoom_factor, self.zoom_factor) * fitz.Matrix(self.rotation_angle)
-        pix = page.get_pixmap(matrix=matrix, alpha=False)
-        
-        qimage = QImage(pix.samples, pix.width, pix.height, pix.stride, QImage.Format.Format_RGB888)
-        self.page_pixmap = QPixmap.fromImage(qimage)
-        
-        self.scene.clear()
-        self.current_pixmap_item = QGraphicsPixmapItem(self.page_pixmap)
-        self.scene.addItem(self.current_pixmap_item)
-        self.view.setSceneRect(self.current_pixmap_item.boundingRect())
+        if self.continuous_mode:
+            self.show_continuous_page()
+        else:
+            matrix = fitz.Matrix(self.zoom_factor, self.zoom_factor) * fitz.Matrix(self.rotation_angle)
+            page_size = (page.rect * matrix).irect
+            self.view.setSceneRect(QRectF(0, 0, page_size.width, page_size.height))
+            self.page_origin = QPointF(0, 0)
+            self.request_page_raster()
         
-        # Получаем активные ссылки с текущей страницы
-        self.extract_active_links(page)
+        self.update_page_overlays(page)
+    
+    def update_page_overlays(self, page):
+        """Ссылки, текст для выделения и подсветка поиска текущей страницы"""
+        self.page_matrix = self.display_matrix(page)
         
-        # Обновляем список ссылок в view
-        self.view.clickable_links = self.active_links.copy()
+        # Ссылки и текстовый слой страницы: из кэша, иначе извлекаются в фоне
+        # потоками рендеринга и приходят в on_layers_ready
+        layers = self.layer_cache.get(self.tab, page.number)
+        self.text_layout, self.link_layer = layers or (None, None)
+        if layers is None and self.render_service:
+            self.render_service.request_layers(page.number)
         
         if self.document:
             self.page_label.setText(f"Страница: {self.current_page_num + 1}/{self.document.page_count}")
         
-        # Получаем текстовые блоки для выделения
-        self.text_blocks = self.extract_text_with_rectangles(page)
         self.clear_selection()
         
-        if self.search_dialog and self.search_dialog.search_results:
-            for result in self.search_dialog.search_results:
-                if result['page'] == self.current_page_num:
-                    self.highlight_search_result(result['rect'], result['text'])
+        self.update_search_overlay()
         
         # Перерисовываем view для отображения ссылок
         self.view.update()
@@ -1654,142 +4543,506 @@ class PDFViewerApp(QMainWindow):
         # Отправляем сигнал об изменении страницы
         self.current_page_changed.emit(self.current_page_num)
     
-    def extract_active_links(self, page):
-        """Извлекает активные ссылки с текущей страницы"""
-        self.active_links = []
+    def display_matrix(self, page):
+        """Матрица из координат PDF в пиксели растра страницы (масштаб и поворот)"""
+        matrix = fitz.Matrix(self.zoom_factor, self.zoom_factor) * fitz.Matrix(self.rotation_angle)
+        bbox = page.rect * matrix
+        return matrix * fitz.Matrix(1, 0, 0, 1, -bbox.x0, -bbox.y0)
+    
+    def pdf_rect_to_scene(self, rect):
+        """Прямоугольник PDF текущей страницы -> QRectF сцены"""
+        r = fitz.Rect(rect) * self.page_matrix
+        return QRectF(r.x0, r.y0, r.width, r.height).translated(self.page_origin)
+    
+    def scene_rect_to_pdf(self, scene_rect):
+        """QRectF сцены -> прямоугольник PDF текущей страницы"""
+        local = scene_rect.translated(-self.page_origin)
+        r = fitz.Rect(local.left(), local.top(), local.right(), local.bottom())
+        return r * ~self.page_matrix
+    
+    def use_tiles(self):
+        """При большом масштабе рендерим только видимые плитки"""
+        return not self.continuous_mode and self.zoom_factor >= self.tile_zoom_threshold
+    
+    def on_viewport_changed(self):
+        """Видимая область изменилась: прокрутка или размер окна"""
+        if self.continuous_mode:
+            scrolled_by_user = self.view.verticalScrollBar().value() != self.programmatic_scroll
+            self.update_continuous_pages(sync_current=scrolled_by_user)
+        else:
+            self.update_visible_tiles()
+    
+    # ------------------------------------------------------------------
+    # Непрерывная прокрутка
+    # ------------------------------------------------------------------
+    def set_continuous_mode(self, enabled):
+        """Переключает одностраничный режим и непрерывную ленту страниц"""
+        self.continuous_mode = enabled
+        QSettings("DeeRTuund", "RuundPDF").setValue("continuous_scroll", enabled)
+        
+        self.clear_tiles()
+        self.clear_continuous_items()
+        self.continuous_layout = None
+        if self.current_pixmap_item is not None:
+            self.current_pixmap_item.setVisible(not enabled)
+        self.scene.setBackgroundBrush(QBrush(QColor(200, 200, 200)) if enabled else QBrush())
+        if self.document:
+            self.render_page()
+    
+    def ensure_continuous_layout(self):
+        layout = self.continuous_layout
+        if layout is None or (layout.zoom, layout.rotation) != (self.zoom_factor, self.rotation_angle):
+            self.clear_continuous_items()
+            self.continuous_layout = ContinuousLayout(self.page_sizes, self.zoom_factor, self.rotation_angle)
+            self.view.setSceneRect(QRectF(0, 0, self.continuous_layout.width, self.continuous_layout.height))
+        return self.continuous_layout
+    
+    def show_continuous_page(self):
+        """Прокручивает ленту к текущей странице.
         
-        try:
-            # Получаем все ссылки с страницы
-            links = page.get_links()
-            
-            for link in links:
-                if 'uri' in link:  # Это внешняя ссылка
-                    rect = link['from']  # Прямоугольник ссылки
-                    
-                    # Применяем масштабирование и поворот
-                    scaled_rect = QRectF(
-                        rect.x0 * self.zoom_factor,
-                        rect.y0 * self.zoom_factor,
-                        (rect.x1 - rect.x0) * self.zoom_factor,
-                        (rect.y1 - rect.y0) * self.zoom_factor
-                    )
-                    
-                    # Применяем поворот
-                    if self.rotation_angle != 0:
-                        center_x = (scaled_rect.left() + scaled_rect.right()) / 2
-                        center_y = (scaled_rect.top() + scaled_rect.bottom()) / 2
-                        
-                        if self.rotation_angle == 90:
-                            new_rect = QRectF(
-                                -scaled_rect.top() + center_x + center_y,
-                                scaled_rect.left() - center_x + center_y,
-                                scaled_rect.height(),
-                                scaled_rect.width()
-                            )
-                            scaled_rect = new_rect
-                    
-                    self.active_links.append({
-                        'rect': scaled_rect,
-                        'uri': link['uri'],
-                        'type': 'external'
-                    })
-                
-                elif 'page' in link:  # Это внутренняя ссылка на страницу
-                    # Можно добавить обработку внутренних ссылок
-                    pass
+        Если эта страница и так текущая на экране (перерисовка после смены
+        масштаба, поворота, вкладки), положение внутри нее сохраняется.
+        """
+        offset = None
+        old_layout = self.continuous_layout
+        if old_layout is not None:
+            visible = self.view.mapToScene(self.view.viewport().rect()).boundingRect()
+            old_rect = old_layout.page_rect(self.current_page_num)
+            if old_layout.page_at(visible.top() + visible.height() / 4) == self.current_page_num \
+                    and old_rect.height() > 0:
+                offset = (visible.top() - old_rect.top()) / old_rect.height()
+        
+        layout = self.ensure_continuous_layout()
+        rect = layout.page_rect(self.current_page_num)
+        self.page_origin = rect.topLeft()
+        
+        scroll_bar = self.view.verticalScrollBar()
+        if offset is None:
+            scroll_bar.setValue(int(rect.top() - layout.spacing / 2))
+        else:
+            scroll_bar.setValue(int(rect.top() + offset * rect.height()))
+        self.programmatic_scroll = scroll_bar.value()
+        self.update_continuous_pages(sync_current=False)
+    
+    def update_continuous_pages(self, sync_current=True):
+        """Создает растры для страниц рядом с видимой областью и освобождает остальные"""
+        layout = self.continuous_layout
+        if not self.document or layout is None:
+            return
         
-        except Exception as e:
-            print(f"Ошибка при извлечении ссылок: {e}")
+        visible = self.view.mapToScene(self.view.viewport().rect()).boundingRect()
+        
+        if sync_current:
+            # Текущей считаем страницу в верхней четверти экрана
+            page_num = layout.page_at(visible.top() + visible.height() / 4)
+            if page_num != self.current_page_num:
+                self.current_page_num = page_num
+                self.page_origin = layout.page_rect(page_num).topLeft()
+                self.update_page_overlays(self.document.load_page(page_num))
+        
+        wanted = self.continuous_wanted()
+        for page_num in list(self.continuous_items):
+            if page_num not in wanted:
+                self.scene.removeItem(self.continuous_items.pop(page_num))
+                self.continuous_shown.pop(page_num, None)
+        
+        jobs = []
+        previews = []
+        for page_num in wanted:
+            key = (page_num, self.zoom_factor, self.rotation_angle)
+            if self.continuous_shown.get(page_num) == key:
+                continue
+            pixmap = self.pixmap_cache.get(key)
+            if pixmap is not None:
+                self.set_continuous_pixmap(page_num, pixmap, key)
+                self.fix_page_size(page_num, pixmap)
+                continue
+            nearest = self.pixmap_cache.find_nearest(*key)
+            if nearest and page_num not in self.continuous_shown:
+                self.set_continuous_pixmap(page_num, nearest[1], (page_num, nearest[0], self.rotation_angle))
+            elif not nearest and self.zoom_factor > self.preview_zoom:
+                previews.append((page_num, self.preview_zoom, self.rotation_angle))
+            jobs.append(key)
+        
+        self.render_service.request_keys(
+            [k for k in previews if k not in self.pixmap_cache] + jobs
+        )
     
-    def extract_text_with_rectangles(self, page):
-        """Извлечение текста с координатами"""
-        text_blocks = []
+    def set_continuous_pixmap(self, page_num, pixmap, key):
+        item = self.continuous_items.get(page_num)
+        if item is None:
+            item = QGraphicsPixmapItem()
+            item.setZValue(-1)
+            self.scene.addItem(item)
+            self.continuous_items[page_num] = item
+        scale = self.zoom_factor / key[1]
+        item.setTransform(QTransform.fromScale(scale, scale))
+        item.setPixmap(pixmap)
+        item.setPos(self.continuous_layout.page_rect(page_num).topLeft())
+        self.continuous_shown[page_num] = key
+        self.on_first_page_shown()
+    
+    def on_first_page_shown(self):
+        if not startup_timing.reported:
+            startup_timing.mark("первая страница на экране")
+            startup_timing.report(self.status_bar)
+    
+    def fix_page_size(self, page_num, image):
+        """Уточняет размер страницы по готовому растру (повернутые страницы и т.п.)
+        
+        image - QImage или QPixmap в масштабе раскладки.
+        """
+        layout = self.continuous_layout
+        width, height = layout.sizes[page_num]
+        if abs(image.width() - width) <= 2 and abs(image.height() - height) <= 2:
+            return
+        
+        real_width, real_height = image.width() / layout.zoom, image.height() / layout.zoom
+        if layout.rotation in (90, 270):
+            real_width, real_height = real_height, real_width
+        self.page_sizes[page_num] = (real_width, real_height)
+        self.relayout_continuous()
+    
+    def relayout_continuous(self):
+        """Перестраивает ленту по новым размерам страниц, сохраняя положение
+        текущей страницы на экране.
         
+        update_continuous_pages может снова вызвать fix_page_size для
+        растров из кэша; такой вложенный вызов только отмечает, что ленту
+        нужно перестроить еще раз, - это делает внешний цикл.
+        """
+        if self.relayout_running:
+            self.relayout_pending = True
+            return
+        self.relayout_running = True
+        self.relayout_pending = True
         try:
-            text_dict = page.get_text("dict")
-            
-            for block in text_dict.get("blocks", []):
-                if "lines" in block:
-                    for line in block["lines"]:
-                        for span in line["spans"]:
-                            text = span["text"]
-                            if not text.strip():
-                                continue
-                                
-                            bbox = span["bbox"]
-                            
-                            # Применяем масштабирование
-                            scaled_bbox = [
-                                bbox[0] * self.zoom_factor,
-                                bbox[1] * self.zoom_factor,
-                                bbox[2] * self.zoom_factor,
-                                bbox[3] * self.zoom_factor
-                            ]
-                            
-                            # Применяем поворот
-                            if self.rotation_angle != 0:
-                                center_x = (scaled_bbox[0] + scaled_bbox[2]) / 2
-                                center_y = (scaled_bbox[1] + scaled_bbox[3]) / 2
-                                
-                                if self.rotation_angle == 90:
-                                    scaled_bbox = [
-                                        -scaled_bbox[1] + center_x + center_y,
-                                        scaled_bbox[0] - center_x + center_y,
-                                        -scaled_bbox[3] + center_x + center_y,
-                                        scaled_bbox[2] - center_x + center_y
-                                    ]
-                            
-                            rect = QRectF(
-                                scaled_bbox[0], 
-                                scaled_bbox[1], 
-                                scaled_bbox[2] - scaled_bbox[0], 
-                                scaled_bbox[3] - scaled_bbox[1]
-                            )
-                            
-                            text_blocks.append({
-                                'text': text,
-                                'bbox': scaled_bbox,
-                                'rect': rect
-                            })
-        except Exception as e:
-            print(f"Ошибка при извлечении текста: {e}")
+            while self.relayout_pending:
+                self.relayout_pending = False
+                scroll_bar = self.view.verticalScrollBar()
+                offset = scroll_bar.value() - self.continuous_layout.page_rect(self.current_page_num).top()
+                self.continuous_layout = None
+                layout = self.ensure_continuous_layout()
+                self.page_origin = layout.page_rect(self.current_page_num).topLeft()
+                scroll_bar.setValue(int(layout.page_rect(self.current_page_num).top() + offset))
+                self.programmatic_scroll = scroll_bar.value()
+                self.update_page_overlays(self.document.load_page(self.current_page_num))
+                self.update_continuous_pages(sync_current=False)
+        finally:
+            self.relayout_running = False
+    
+    def continuous_wanted(self):
+        """Видимые страницы ленты и по одной странице сверху и снизу"""
+        visible = self.view.mapToScene(self.view.viewport().rect()).boundingRect()
+        visible_pages = self.continuous_layout.pages_between(visible.top(), visible.bottom())
+        wanted = list(visible_pages)
+        for page_num in (visible_pages.start - 1, visible_pages.stop):
+            if 0 <= page_num < self.document.page_count:
+                wanted.append(page_num)
+        return wanted
+    
+    def clear_continuous_items(self):
+        for item in self.continuous_items.values():
+            self.scene.removeItem(item)
+        self.continuous_items.clear()
+        self.continuous_shown.clear()
+    
+    def request_page_raster(self):
+        """Показывает растр текущей страницы из кэша и заказывает недостающее"""
+        self.clear_tiles()
+        if self.use_tiles():
+            # Под плитками лежит растянутое превью всей страницы
+            nearest = self.pixmap_cache.find_nearest(*self.render_key())
+            if nearest:
+                self.show_page_pixmap(nearest[1], (self.current_page_num, nearest[0], self.rotation_angle))
+            else:
+                self.show_page_pixmap(QPixmap())
+            # Видимая область известна только после обновления прокрутки
+            QTimer.singleShot(0, self.update_visible_tiles)
+            return
+        
+        # Растр берем из кэша; иначе сразу показываем растянутое превью,
+        # а полный растр подменит его, когда будет готов
+        key = self.render_key()
+        pixmap = self.pixmap_cache.get(key)
+        preview_zoom = None
+        if pixmap is not None:
+            self.show_page_pixmap(pixmap, key)
+        else:
+            nearest = self.pixmap_cache.find_nearest(*key)
+            if nearest:
+                self.show_page_pixmap(nearest[1], (self.current_page_num, nearest[0], self.rotation_angle))
+            else:
+                self.show_page_pixmap(QPixmap())
+            if self.zoom_factor > self.preview_zoom and not (nearest and nearest[0] >= self.preview_zoom):
+                preview_zoom = self.preview_zoom
+        self.render_service.request(
+            self.current_page_num, self.zoom_factor, self.rotation_angle,
+            self.document.page_count, self.page_direction,
+            skip=lambda k: k in self.pixmap_cache,
+            preview_zoom=preview_zoom
+        )
+        self.page_direction = 0
+    
+    def update_visible_tiles(self):
+        """Оставляет на сцене только плитки, пересекающие видимую область,
+        и заказывает рендеринг недостающих"""
+        if not self.document or not self.render_service or not self.use_tiles():
+            return
+        
+        page_rect = self.view.sceneRect()
+        visible = self.view.mapToScene(self.view.viewport().rect()).boundingRect()
+        # Небольшой запас, чтобы соседние плитки были готовы к прокрутке
+        margin = self.tile_size / 2
+        visible = visible.adjusted(-margin, -margin, margin, margin).intersected(page_rect)
+        if visible.isEmpty():
+            return
+        
+        ts = self.tile_size
+        cols = range(int(visible.left() // ts), int((visible.right() - 1) // ts) + 1)
+        rows = range(int(visible.top() // ts), int((visible.bottom() - 1) // ts) + 1)
+        center = visible.center()
+        wanted = sorted(
+            ((c, r) for c in cols for r in rows),
+            key=lambda cr: abs((cr[0] + 0.5) * ts - center.x()) + abs((cr[1] + 0.5) * ts - center.y())
+        )
+        
+        base = self.render_key()
+        wanted_keys = {base + tile for tile in wanted}
+        for key in list(self.tile_items):
+            if key not in wanted_keys:
+                self.scene.removeItem(self.tile_items.pop(key))
+        for key in wanted_keys:
+            if key not in self.tile_items:
+                pixmap = self.tile_cache.get(key)
+                if pixmap is not None:
+                    self.add_tile_item(key, pixmap)
+        
+        preview_key = (self.current_page_num, self.preview_zoom, self.rotation_angle)
+        self.render_service.request(
+            self.current_page_num, self.zoom_factor, self.rotation_angle,
+            self.document.page_count, self.page_direction,
+            skip=lambda k: k in self.tile_items or k in self.tile_cache or k in self.pixmap_cache,
+            preview_zoom=self.preview_zoom if self.shown_render_key is None and preview_key not in self.pixmap_cache else None,
+            tiles=wanted
+        )
+        self.page_direction = 0
+    
+    def add_tile_item(self, key, pixmap):
+        item = QGraphicsPixmapItem(pixmap)
+        item.setZValue(-0.5)
+        item.setPos(key[3] * self.tile_size, key[4] * self.tile_size)
+        self.scene.addItem(item)
+        self.tile_items[key] = item
+    
+    def clear_tiles(self):
+        """Убирает плитки со сцены (сами растры остаются в кэше плиток)"""
+        for item in self.tile_items.values():
+            self.scene.removeItem(item)
+        self.tile_items.clear()
+    
+    def on_tile_rendered(self, key, image):
+        """Получает готовую плитку из фонового потока"""
+        if not self.document or self.from_stale_service():
+            return
+        pixmap = QPixmap.fromImage(image)
+        self.tile_cache.put(key, pixmap)
+        if key[:3] == self.render_key() and self.use_tiles() and key not in self.tile_items:
+            visible = self.view.mapToScene(self.view.viewport().rect()).boundingRect()
+            ts = self.tile_size
+            margin = ts / 2
+            tile_rect = QRectF(key[3] * ts, key[4] * ts, ts, ts)
+            if tile_rect.intersects(visible.adjusted(-margin, -margin, margin, margin)):
+                self.add_tile_item(key, pixmap)
+    
+    def show_page_pixmap(self, pixmap, key=None):
+        """Показывает растр текущей страницы, не трогая подсветку поиска.
+
+        Растр другого масштаба (превью) растягивается до размера страницы.
+        """
+        if self.current_pixmap_item is None:
+            self.current_pixmap_item = QGraphicsPixmapItem()
+            self.current_pixmap_item.setZValue(-1)
+            self.scene.addItem(self.current_pixmap_item)
+        scale = self.zoom_factor / key[1] if key else 1.0
+        self.current_pixmap_item.setTransform(QTransform.fromScale(scale, scale))
+        self.current_pixmap_item.setPixmap(pixmap)
+        self.page_pixmap = pixmap
+        self.shown_render_key = key
+        self.on_first_page_shown()
+    
+    def on_page_rendered(self, page_num, zoom, rotation, image):
+        """Получает готовый растр из фонового потока"""
+        if not self.document or self.from_stale_service():
+            return
+        
+        key = (page_num, zoom, rotation)
+        pixmap = QPixmap.fromImage(image)
+        self.pixmap_cache.put(key, pixmap)
+        
+        if self.continuous_mode:
+            layout = self.continuous_layout
+            if layout is None or page_num not in self.continuous_wanted():
+                return
+            if (zoom, rotation) == (layout.zoom, layout.rotation):
+                self.set_continuous_pixmap(page_num, pixmap, key)
+                self.fix_page_size(page_num, image)
+            elif rotation == layout.rotation and page_num not in self.continuous_shown:
+                self.set_continuous_pixmap(page_num, pixmap, key)
+            return
+        
+        if key == self.render_key():
+            self.show_page_pixmap(pixmap, key)
+        elif (page_num, rotation) == (self.current_page_num, self.rotation_angle) and (
+                self.shown_render_key is None or
+                abs(zoom - self.zoom_factor) < abs(self.shown_render_key[1] - self.zoom_factor)):
+            # Превью (или растр ближе к нужному масштабу), пока полный растр не готов
+            self.show_page_pixmap(pixmap, key)
+    
+    def from_stale_service(self):
+        """Сигнал пришел от сервиса рендеринга другой (фоновой или закрытой)
+        вкладки: готовые растры попадают в очередь событий и после переключения"""
+        sender = self.sender()
+        return isinstance(sender, PageRenderService) and sender is not self.render_service
+    
+    def on_layers_ready(self, page_num, text_layout, link_layer):
+        """Текст и ссылки страницы, извлеченные в фоновом потоке"""
+        if not self.document or self.from_stale_service():
+            return
+        self.layer_cache.put(self.tab, page_num, text_layout, link_layer)
+        if page_num == self.current_page_num:
+            self.text_layout = text_layout
+            self.link_layer = link_layer
+            self.view.update()
+    
+    def follow_internal_link(self, link):
+        """Переход по внутренней ссылке с запоминанием в истории"""
+        target = link['page']
+        if not 0 <= target < self.document.page_count:
+            return
+        self.history_back.append(self.current_page_num)
+        self.history_forward.clear()
+        self.goto_page(target, link.get('to'))
+        self.status_bar.showMessage(f"Переход по ссылке на страницу {target + 1} (Alt+← - вернуться)")
+    
+    def goto_page(self, page_num, point=None):
+        """Показывает страницу; point - точка PDF, которую нужно прокрутить к верху"""
+        self.current_page_num = page_num
+        self.render_page()
+        if point is not None:
+            scene_rect = self.pdf_rect_to_scene(fitz.Rect(point, point))
+            scroll_bar = self.view.verticalScrollBar()
+            scroll_bar.setValue(int(scene_rect.top()))
+            self.programmatic_scroll = scroll_bar.value()
+    
+    def history_go_back(self):
+        if self.document and self.history_back:
+            self.history_forward.append(self.current_page_num)
+            self.goto_page(self.history_back.pop())
+    
+    def history_go_forward(self):
+        if self.document and self.history_forward:
+            self.history_back.append(self.current_page_num)
+            self.goto_page(self.history_forward.pop())
+    
+    def show_links_to_page(self):
+        """Показывает страницы, ссылающиеся на текущую"""
+        if not self.document or not self.link_graph:
+            return
+        
+        if not self.link_graph.is_built:
+            # Граф строится один раз; диалог откроется, когда он будет готов
+            self.status_bar.showMessage("Построение графа ссылок документа...")
+            self.links_here_requested = True
+            self.link_graph.build()
+            return
+        
+        page_num = self.current_page_num
+        sources = self.link_graph.links_to(page_num)
+        
+        dialog = QDialog(self)
+        dialog.setWindowTitle(f"Ссылки на страницу {page_num + 1}")
+        dialog.setGeometry(250, 250, 400, 300)
+        layout = QVBoxLayout()
+        
+        sources_list = QListWidget()
+        if not sources:
+            sources_list.addItem("Нет ссылок на эту страницу")
+            sources_list.setEnabled(False)
+        for source_page, _ in sources:
+            sources_list.addItem(f"Страница {source_page + 1}")
+        
+        def go_to_source(item):
+            source_page, link = sources[sources_list.row(item)]
+            self.history_back.append(self.current_page_num)
+            self.history_forward.clear()
+            self.goto_page(source_page, link['rect'].tl)
+            dialog.accept()
+        
+        sources_list.itemDoubleClicked.connect(go_to_source)
+        layout.addWidget(sources_list)
         
-        return text_blocks
+        btn_close = QPushButton("Закрыть")
+        btn_close.clicked.connect(dialog.accept)
+        layout.addWidget(btn_close)
+        
+        dialog.setLayout(layout)
+        dialog.exec()
+    
+    def on_link_graph_built(self):
+        sender = self.sender()
+        if isinstance(sender, DocumentLinkGraph) and sender is not self.link_graph:
+            return  # Граф фоновой вкладки
+        if self.links_here_requested:
+            self.links_here_requested = False
+            self.show_links_to_page()
+    
+    def on_link_graph_failed(self, message):
+        if self.sender() is not self.link_graph:
+            return
+        self.links_here_requested = False
+        self.status_bar.showMessage(f"Не удалось построить граф ссылок: {message}", 5000)
+    
+    def link_at(self, scene_pos):
+        """Ссылка текущей страницы под точкой сцены (для наведения, клика, подсказок)"""
+        if not self.link_layer:
+            return None
+        local = scene_pos - self.page_origin
+        point = fitz.Point(local.x(), local.y()) * ~self.page_matrix
+        return self.link_layer.link_at(point)
+    
+    def extract_text_with_rectangles(self, page):
+        """Текстовый слой страницы в координатах PDF сразу, в потоке окна
+        (в кэш слоев попадет результат фонового извлечения)"""
+        return PageTextLayout(page)
     
     def get_text_for_page(self, page_num):
-        """ПОЛНОСТЬЮ ПЕРЕРАБОТАННЫЙ МЕТОД - с определением языка"""
+        """Текст страницы для озвучки с метками языка "[lang xx]" перед
+        абзацами, где язык меняется (язык определяется один раз и кэшируется)"""
         if self.document and 0 <= page_num < self.document.page_count:
             page = self.document.load_page(page_num)
-            text = page.get_text()
+            paragraphs = language_detector.page_paragraphs(page, (self.file_path, page_num))
             
-            if text and text.strip():
-                # Определяем язык текста
-                try:
-                    # Берем первые 500 символов для определения языка
-                    sample_text = text[:500].strip()
-                    if sample_text:
-                        language = detect(sample_text)
-                        print(f"Страница {page_num + 1}: язык определен как '{language}'")
-                        
-                        # Добавляем метку языка для TTS (если поддерживается)
-                        if language == 'en':
-                            text = "[lang en]" + text
-                        elif language == 'ru':
-                            text = "[lang ru]" + text
-                        # Можно добавить другие языки
-                except Exception as e:
-                    print(f"Не удалось определить язык: {e}")
+            parts = []
+            current_language = None
+            for text, language in paragraphs:
+                if language and language != current_language:
+                    parts.append(f"[lang {language}]")
+                    current_language = language
+                parts.append(text)
+            text = "".join(parts)
             
-            print(f"Извлечен текст страницы {page_num + 1}: {len(text or '')} символов")
-            return text if text and text.strip() else " "
+            print(f"Извлечен текст страницы {page_num + 1}: {len(text)} символов")
+            return text if text.strip() else " "
         return " "
     
     def get_text_in_rectangle(self, selection_rect):
         """Получение текста в выделенной области"""
-        if not self.text_blocks or not selection_rect:
+        if not self.document or not selection_rect:
             return ""
-        
-        selected_text_parts = []
+        if self.text_layout is None:
+            # Фоновое извлечение еще не успело - пользователь уже выделяет
+            self.text_layout = self.extract_text_with_rectangles(self.document.load_page(self.current_page_num))
         
         rect_int = QRect(
             int(selection_rect.x()),
@@ -1808,17 +5061,13 @@ class PDFViewerApp(QMainWindow):
             abs(bottom_right_scene.y() - top_left_scene.y())
         )
         
-        for block in self.text_blocks:
-            block_rect = block['rect']
-            if scene_rect.intersects(block_rect):
-                selected_text_parts.append(block['text'])
-        
-        result = ' '.join(selected_text_parts)
-        return result.strip() if result else ""
+        # Переводим выделение в координаты PDF - текстовый слой хранится в них
+        return self.text_layout.text_in_rect(self.scene_rect_to_pdf(scene_rect))
     
     def next_page(self):
         if self.document and self.current_page_num < self.document.page_count - 1:
             self.current_page_num += 1
+            self.page_direction = 1
             self.render_page()
             # Отправляем сигнал об изменении страницы
             self.current_page_changed.emit(self.current_page_num)
@@ -1826,15 +5075,51 @@ class PDFViewerApp(QMainWindow):
     def prev_page(self):
         if self.document and self.current_page_num > 0:
             self.current_page_num -= 1
+            self.page_direction = -1
             self.render_page()
             # Отправляем сигнал об изменении страницы
             self.current_page_changed.emit(self.current_page_num)
     
     def change_zoom(self, value):
-        self.zoom_factor = value / 100.0
+        self.pending_zoom = value / 100.0
         self.zoom_value_label.setText(f"{value}%")
-        if self.document:
+        if not self.document:
+            self.zoom_factor = self.pending_zoom
+            return
+        
+        # Мгновенно масштабируем уже показанную страницу средствами view,
+        # а растеризуем один раз, когда пользователь перестанет крутить
+        scale = self.pending_zoom / self.zoom_factor
+        self.view.setTransform(QTransform.fromScale(scale, scale))
+        self.zoom_timer.start()
+    
+    def commit_pending_zoom(self):
+        """Переносит отложенный масштаб в zoom_factor и снимает растяжение view.
+        
+        Возвращает True, если масштаб изменился.
+        """
+        self.zoom_timer.stop()
+        if not self.view.transform().isIdentity():
+            self.view.resetTransform()
+        changed = self.pending_zoom != self.zoom_factor
+        self.zoom_factor = self.pending_zoom
+        return changed
+    
+    def on_zoom_settled(self):
+        """Жест масштабирования закончился - рендерим страницу в новом масштабе"""
+        if not self.document:
+            return
+        
+        # Запоминаем относительную точку в центре экрана, чтобы не прыгать
+        scene_rect = self.view.sceneRect()
+        center = self.view.mapToScene(self.view.viewport().rect().center())
+        rel_x = center.x() / scene_rect.width() if scene_rect.width() else 0.5
+        rel_y = center.y() / scene_rect.height() if scene_rect.height() else 0.5
+        
+        if self.commit_pending_zoom():
             self.render_page()
+            scene_rect = self.view.sceneRect()
+            self.view.centerOn(rel_x * scene_rect.width(), rel_y * scene_rect.height())
     
     def rotate_left(self):
         self.rotation_angle = (self.rotation_angle - 90) % 360
@@ -1859,6 +5144,12 @@ class PDFViewerApp(QMainWindow):
         self.tts_player = TTSPlayerWidget(self, self.get_text_for_page, doc_info)
         self.tts_player.show()
     
+    def show_audiobook_export(self):
+        if not self.document:
+            QMessageBox.warning(self, "Ошибка", "Сначала откройте PDF файл.")
+            return
+        AudiobookExportDialog(self).exec()
+    
     def save_file(self):
         if self.document and self.file_path:
             try:
@@ -1878,6 +5169,7 @@ class PDFViewerApp(QMainWindow):
             try:
                 self.document.save(file_path)
                 self.file_path = file_path
+                self.update_window_title()
                 QMessageBox.information(self, "Сохранение", "Файл сохранен.")
             except Exception as e:
                 QMessageBox.critical(self, "Ошибка", f"Не удалось сохранить: {e}")
@@ -1886,6 +5178,7 @@ class PDFViewerApp(QMainWindow):
         if not self.document:
             return
         
+        from PyQt6.QtPrintSupport import QPrintDialog  # Печать нужна редко
         printer = QPainter()
         printDialog = QPrintDialog()
         
@@ -2072,7 +5365,9 @@ class PDFViewerApp(QMainWindow):
     
     def copy_all_text(self):
         """Копирует весь текст текущей страницы в буфер обмена."""
-        text = self.get_text_for_page(self.current_page_num)
+        if not self.document:
+            return
+        text = self.document.load_page(self.current_page_num).get_text()
         if text:
             QApplication.clipboard().setText(text)
             self.status_bar.showMessage("Весь текст страницы скопирован в буфер обмена")
@@ -2116,6 +5411,27 @@ class PDFViewerApp(QMainWindow):
         else:
             self.status_bar.showMessage("Нет выделенного текста для копирования")
     
+    def open_from_other_instance(self, file_path):
+        """Путь, переданный повторным запуском приложения"""
+        if self.isMinimized():
+            self.showNormal()
+        self.raise_()
+        self.activateWindow()
+        if file_path and os.path.exists(file_path):
+            self.open_file(file_path)
+    
+    def closeEvent(self, event):
+        """При выходе останавливает фоновые потоки и процессы"""
+        self.cancel_open()
+        startup_timing.append(["Кэши растров за сеанс:",
+                               f"  страницы - {self.pixmap_cache.stats()}",
+                               f"  плитки - {self.tile_cache.stats()}"])
+        for tab in self.open_tabs():
+            tab.close()
+        self.render_pool.shutdown()
+        self.search_pool.shutdown()
+        super().closeEvent(event)
+    
     def show_about_dialog(self):
         about_dialog = QDialog(self)
         about_dialog.setWindowTitle("О программе RuundPDF")
@@ -2164,14 +5480,45 @@ class PDFViewerApp(QMainWindow):
 # ЗАПУСК ПРИЛОЖЕНИЯ
 # ============================================================================
 if __name__ == '__main__':
-    app = QApplication(sys.argv)
-    file_to_open = None
+    # --startup-timing: вывести замеры времени запуска до первой страницы
+    # --new-instance: открыть отдельное окно, не передавая файл запущенному
+    flags = {"--startup-timing", "--new-instance"}
+    args = [arg for arg in sys.argv[1:] if arg not in flags]
+    startup_timing.enabled = "--startup-timing" in sys.argv[1:]
     
-    if len(sys.argv) > 1:
-        file_to_open = sys.argv[1]
+    file_to_open = None
+    if args:
+        file_to_open = os.path.abspath(args[0])
         if not os.path.exists(file_to_open):
             file_to_open = None
     
+    single_instance = None
+    single_instance_enabled = QSettings("DeeRTuund", "RuundPDF").value("single_instance", True, type=bool)
+    if single_instance_enabled and "--new-instance" not in sys.argv[1:]:
+        # Уже запущен - отдаем ему файл и выходим, не создавая окно
+        if SingleInstance.send_to_running(file_to_open):
+            print("Файл передан запущенному экземпляру RuundPDF")
+            sys.exit(0)
+        single_instance = SingleInstance()
+    
+    app = QApplication(sys.argv)
+    startup_timing.mark("QApplication")
+    
+    if single_instance and not single_instance.listen():
+        # Проиграли гонку одновременного запуска - отдаем файл победителю
+        if SingleInstance.is_running() and SingleInstance.send_to_running(file_to_open):
+            print("Файл передан запущенному экземпляру RuundPDF")
+            sys.exit(0)
+        single_instance = None
+    
     window = PDFViewerApp(file_to_open)
+    startup_timing.mark("главное окно создано")
+    if single_instance:
+        # Подключения до app.exec() ждут в очереди событий и не теряются
+        single_instance.file_received.connect(window.open_from_other_instance)
+        app.aboutToQuit.connect(single_instance.close)
     window.show()
+    if not file_to_open:
+        # Без файла отчет - после первого цикла событий (окно показано)
+        QTimer.singleShot(0, lambda: (startup_timing.mark("окно показано"), startup_timing.report(window.status_bar)))
     sys.exit(app.exec())
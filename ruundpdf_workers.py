@@ -0,0 +1,344 @@
+"""
+Рабочие процессы RuundPDF: растеризация страниц, извлечение их текста и
+ссылок, восстановление поврежденных файлов, параллельный поиск.
+
+Модуль не импортирует PyQt6: дочерние процессы запускаются с ним в роли
+главного модуля и не загружают GUI приложения.
+Author: DeeR Tuund (c) 2025
+"""
+
+import os
+import sys
+import time
+import queue
+import threading
+import contextlib
+import multiprocessing
+from collections import OrderedDict
+
+import fitz
+
+# ============================================================================
+# ЗАПУСК ПРОЦЕССОВ
+# ============================================================================
+# Подмена __main__.__spec__ действует для всего процесса, поэтому все
+# запуски spawn-процессов приложения идут под этой блокировкой
+spawn_lock = threading.Lock()
+_SPEC = __spec__
+
+@contextlib.contextmanager
+def light_spawn():
+    """Процессы, запущенные (spawn) внутри блока, импортируют этот модуль
+    вместо главного модуля GUI.
+
+    Без подмены spawn заново выполняет в каждом дочернем процессе скрипт
+    приложения вместе с импортом PyQt6.
+    """
+    main = sys.modules['__main__']
+    with spawn_lock:
+        saved = main.__dict__.get('__spec__')
+        main.__spec__ = _SPEC
+        try:
+            yield
+        finally:
+            main.__spec__ = saved
+
+# ============================================================================
+# РАСТЕРИЗАЦИЯ И СЛОИ СТРАНИЦ
+# ============================================================================
+def render_page_samples(page, zoom, rotation, tile=None, tile_size=512):
+    """Растеризует страницу или ее плитку: (ширина, высота, stride, RGB-байты).
+
+    Плитка (col, row) - квадрат tile_size пикселей в системе координат
+    полного растра; верхний левый угол плитки - (col, row) * tile_size.
+    """
+    matrix = fitz.Matrix(zoom, zoom) * fitz.Matrix(rotation)
+    clip = None
+    if tile is not None:
+        col, row = tile
+        bbox = page.rect * matrix
+        tile_rect = fitz.Rect(col * tile_size, row * tile_size,
+                              (col + 1) * tile_size, (row + 1) * tile_size)
+        tile_rect += (bbox.x0, bbox.y0, bbox.x0, bbox.y0)
+        clip = (tile_rect * ~matrix) & page.rect
+    pix = page.get_pixmap(matrix=matrix, clip=clip, alpha=False)
+    return pix.width, pix.height, pix.stride, pix.samples
+
+def page_text_spans(page):
+    """Непустые спаны текста страницы: [(текст, (x0, y0, x1, y1))]"""
+    spans = []
+    text_dict = page.get_text("dict")
+    for block in text_dict.get("blocks", []):
+        for line in block.get("lines", []):
+            for span in line["spans"]:
+                if span["text"].strip():
+                    spans.append((span["text"], tuple(span["bbox"])))
+    return spans
+
+def page_links(page):
+    """Ссылки страницы из get_links() с Rect/Point, замененными кортежами"""
+    return [{key: tuple(value) if isinstance(value, (fitz.Rect, fitz.Point)) else value
+             for key, value in link.items()}
+            for link in page.get_links()]
+
+# ============================================================================
+# ПРОЦЕССЫ РЕНДЕРИНГА
+# ============================================================================
+RENDER_OPEN_DOCUMENTS = 8  # Сколько документов процесс держит открытыми
+
+def _open_document(documents, file_path):
+    """Документ из кэша процесса; ключ учитывает размер и время изменения файла"""
+    stat = os.stat(file_path)
+    key = (file_path, stat.st_size, stat.st_mtime_ns)
+    document = documents.get(key)
+    if document is None:
+        document = fitz.open(file_path)
+        documents[key] = document
+        while len(documents) > RENDER_OPEN_DOCUMENTS:
+            documents.popitem(last=False)[1].close()
+    documents.move_to_end(key)
+    return document
+
+def _render_process_main(connection):
+    """Цикл процесса рендеринга: задания приходят и уходят через Pipe.
+
+    ('page', путь, страница, масштаб, поворот, плитка, размер плитки) ->
+    render_page_samples; ('layers', путь, страница) -> (спаны, ссылки);
+    ('close', путь) закрывает документ; None завершает процесс.
+    """
+    documents = OrderedDict()  # (путь, размер, mtime) -> fitz.Document
+    try:
+        while True:
+            try:
+                job = connection.recv()
+            except EOFError:
+                break
+            if job is None:
+                break
+            try:
+                if job[0] == 'close':
+                    for key in [key for key in documents if key[0] == job[1]]:
+                        documents.pop(key).close()
+                    result = None
+                else:
+                    page = _open_document(documents, job[1]).load_page(job[2])
+                    if job[0] == 'layers':
+                        result = (page_text_spans(page), page_links(page))
+                    else:
+                        result = render_page_samples(page, *job[3:])
+                connection.send(('ok', result))
+            except Exception as e:
+                connection.send(('error', str(e)))
+    finally:
+        for document in documents.values():
+            document.close()
+
+class RenderProcessPool:
+    """Процессы растеризации, общие для всех вкладок приложения.
+
+    PyMuPDF держит GIL во время get_pixmap и не рассчитан на работу из
+    нескольких потоков, поэтому страницы растеризуются в отдельных
+    процессах. Потоки вызывающего только ждут ответа процесса (call
+    блокирует поток, но не GIL).
+    """
+    def __init__(self, processes=2):
+        self.size = max(1, processes)
+        self._context = multiprocessing.get_context("spawn")
+        self._idle = queue.Queue()       # Свободные процессы: (process, connection)
+        self._workers = []
+        self._lock = threading.Lock()
+        self._close_lock = threading.Lock()
+        self._closed = False
+        for _ in range(self.size):
+            self._idle.put(self._spawn())
+
+    def _spawn(self):
+        parent_connection, child_connection = self._context.Pipe()
+        process = self._context.Process(target=_render_process_main, args=(child_connection,),
+                                        name="ruundpdf-render", daemon=True)
+        with light_spawn():
+            process.start()
+        child_connection.close()
+        worker = (process, parent_connection)
+        with self._lock:
+            self._workers.append(worker)
+        return worker
+
+    def _replace(self, worker):
+        """Заменяет упавший процесс (например, на поврежденной странице)"""
+        process, connection = worker
+        connection.close()
+        process.join(1)
+        with self._lock:
+            self._workers.remove(worker)
+            if self._closed:
+                return None
+        return self._spawn()
+
+    def call(self, *job):
+        """Выполняет задание в свободном процессе и возвращает результат.
+
+        Ошибка задания или падение процесса - RuntimeError.
+        """
+        worker = self._idle.get()
+        if worker is None or self._closed:
+            self._idle.put(worker)
+            raise RuntimeError("Пул рендеринга закрыт")
+        try:
+            worker[1].send(job)
+            status, result = worker[1].recv()
+        except (EOFError, OSError) as e:
+            worker = self._replace(worker)
+            raise RuntimeError(f"Процесс рендеринга завершился: {e}")
+        finally:
+            self._idle.put(worker)
+        if status == 'error':
+            raise RuntimeError(result)
+        return result
+
+    def render(self, file_path, page_num, zoom, rotation, tile=None, tile_size=512):
+        """(ширина, высота, stride, RGB-байты) страницы или плитки (col, row)"""
+        return self.call('page', file_path, page_num, zoom, rotation, tile, tile_size)
+
+    def layers(self, file_path, page_num):
+        """([(текст, bbox)], [ссылки get_links()]) страницы"""
+        return self.call('layers', file_path, page_num)
+
+    def close_document(self, file_path):
+        """Закрывает документ во всех процессах (вкладка закрыта).
+
+        Ждет, пока каждый процесс закончит текущее задание: после возврата
+        файл никем в пуле не открыт.
+        """
+        with self._close_lock:
+            taken = []
+            try:
+                while len(taken) < self.size:
+                    worker = self._idle.get()
+                    taken.append(worker)
+                    if worker is None or self._closed:
+                        return
+                for index, worker in enumerate(taken):
+                    try:
+                        worker[1].send(('close', file_path))
+                        worker[1].recv()
+                    except (EOFError, OSError):
+                        taken[index] = self._replace(worker)
+            finally:
+                for worker in taken:
+                    self._idle.put(worker)
+
+    def shutdown(self, timeout=2.0):
+        """Завершает процессы; занятые заданием получают timeout секунд"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            workers = list(self._workers)
+        # Команду завершения шлем только свободным процессам: в соединение
+        # занятого сейчас пишет и читает поток, ждущий результат
+        deadline = time.monotonic() + timeout
+        for _ in workers:
+            try:
+                worker = self._idle.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if worker is not None:
+                try:
+                    worker[1].send(None)
+                except OSError:
+                    pass
+        for process, connection in workers:
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                process.terminate()
+                process.join(1)
+        self._idle.put(None)  # Будит потоки, ждущие свободный процесс
+
+# ============================================================================
+# ВОССТАНОВЛЕНИЕ ФАЙЛОВ
+# ============================================================================
+def repair_pdf_in_process(file_path, output_path):
+    """Рабочая функция отдельного процесса: MuPDF восстанавливает файл,
+    не отпуская GIL, поэтому не в потоке окна. Сохраняется исправная копия."""
+    document = fitz.open(file_path)
+    try:
+        document.save(output_path)
+    finally:
+        document.close()
+
+# ============================================================================
+# ПАРАЛЛЕЛЬНЫЙ ПОИСК
+# ============================================================================
+def search_pages_in_process(file_path, text, page_numbers):
+    """Рабочая функция пула процессов: ищет текст на заданных страницах.
+
+    Каждый процесс открывает собственный fitz.Document; прямоугольники
+    возвращаются кортежами, чтобы результат дешево передавался обратно.
+    """
+    document = fitz.open(file_path)
+    try:
+        return [(page_num, tuple(rect))
+                for page_num in page_numbers
+                for rect in document.load_page(page_num).search_for(text)]
+    finally:
+        document.close()
+
+class SharedProcessPool:
+    """ProcessPoolExecutor, общий для всех вкладок; закрывается после простоя.
+
+    Пользователь берет пул вызовом acquire() и возвращает release();
+    когда пул никому не нужен idle_timeout секунд, процессы завершаются.
+    Процессы запускаются через light_spawn, поэтому рабочие функции
+    должны жить в этом модуле.
+    """
+    def __init__(self, max_workers, idle_timeout=60.0):
+        self.max_workers = max(1, max_workers)
+        self.idle_timeout = idle_timeout
+        self._executor = None
+        self._users = 0
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            self._users += 1
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+    def release(self):
+        with self._lock:
+            self._users -= 1
+            if self._users == 0 and self._executor is not None:
+                self._timer = threading.Timer(self.idle_timeout, self._shutdown_idle)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def submit(self, fn, *args):
+        """Ставит задание в пул (между acquire и release); процессы - по мере надобности"""
+        from concurrent.futures import ProcessPoolExecutor  # Нужен только поиску
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                     mp_context=multiprocessing.get_context("spawn"))
+            executor = self._executor
+        with light_spawn():
+            return executor.submit(fn, *args)
+
+    def _shutdown_idle(self):
+        with self._lock:
+            if self._users or self._executor is None:
+                return
+            executor, self._executor, self._timer = self._executor, None, None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self):
+        """Завершает процессы (выход из приложения)"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
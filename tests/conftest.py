@@ -0,0 +1,29 @@
+import importlib.util
+import os
+import sys
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(ROOT, "app_main_v3.0.1.py")
+sys.path.insert(0, ROOT)  # ruundpdf_workers - рядом с приложением
+
+
+@pytest.fixture(scope="session")
+def app():
+    """Модуль приложения (в имени файла точки - обычный import не подходит)"""
+    spec = importlib.util.spec_from_file_location("app_main", APP_PATH)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["app_main"] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(scope="session")
+def render_pool(app):
+    """Общий пул процессов рендеринга на все тесты"""
+    pool = app.RenderProcessPool(1)
+    yield pool
+    pool.shutdown()
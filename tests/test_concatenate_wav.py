@@ -0,0 +1,45 @@
+import wave
+from types import SimpleNamespace
+
+
+def write_wav(path, nchannels, sampwidth, framerate, nframes):
+    with wave.open(str(path), 'wb') as output:
+        output.setnchannels(nchannels)
+        output.setsampwidth(sampwidth)
+        output.setframerate(framerate)
+        output.writeframes(bytes(nframes * nchannels * sampwidth))
+    return str(path)
+
+
+def test_same_format_is_copied_as_is(app, tmp_path):
+    parts = [write_wav(tmp_path / f"{i}.wav", 1, 2, 22050, 22050) for i in range(2)]
+    offsets = app.concatenate_wav(parts, str(tmp_path / "book.wav"))
+
+    assert offsets == [0.0, 1.0]
+    with wave.open(str(tmp_path / "book.wav"), 'rb') as book:
+        assert (book.getnchannels(), book.getsampwidth(), book.getframerate()) == (1, 2, 22050)
+        assert book.getnframes() == 44100
+
+
+def test_mixed_formats_are_converted_to_first_part(app, tmp_path):
+    parts = [
+        write_wav(tmp_path / "ru.wav", 1, 2, 22050, 22050),
+        write_wav(tmp_path / "en.wav", 2, 1, 16000, 8000),
+        write_wav(tmp_path / "de.wav", 1, 4, 44100, 44100),
+    ]
+    offsets = app.concatenate_wav(parts, str(tmp_path / "book.wav"))
+
+    assert offsets == [0.0, 1.0, 1.5]
+    with wave.open(str(tmp_path / "book.wav"), 'rb') as book:
+        assert (book.getnchannels(), book.getsampwidth(), book.getframerate()) == (1, 2, 22050)
+        assert book.getnframes() == 22050 * 5 // 2
+
+
+def test_convert_pcm_keeps_signal_level(app):
+    params = SimpleNamespace(nchannels=2, sampwidth=1, framerate=8000)
+    frames = bytes([255, 255, 0, 0, 128, 128, 255, 255])  # 8 бит: максимум, минимум, ноль
+    converted = app.convert_pcm(frames, params, 1, 8000)
+
+    samples = app.array('h')
+    samples.frombytes(converted)
+    assert list(samples) == [127 << 8, -128 << 8, 0, 127 << 8]
@@ -0,0 +1,28 @@
+import fitz
+
+
+def test_graph_collects_incoming_internal_links(app, tmp_path):
+    path = str(tmp_path / "doc.pdf")
+    document = fitz.open()
+    for _ in range(3):
+        document.new_page()
+    document[0].insert_link({'kind': fitz.LINK_GOTO, 'from': fitz.Rect(10, 10, 50, 30), 'page': 2, 'to': fitz.Point(0, 0)})
+    document.save(path)
+    document.close()
+
+    graph = app.DocumentLinkGraph(path)
+    graph._build()
+    assert graph.is_built
+    assert [source for source, _ in graph.links_to(2)] == [0]
+
+
+def test_failed_build_is_not_marked_built(app, tmp_path):
+    graph = app.DocumentLinkGraph(str(tmp_path / "missing.pdf"))
+    errors = []
+    graph.failed.connect(errors.append)
+    graph._thread = object()  # Как будто build() запустил поток
+    graph._build()
+
+    assert not graph.is_built
+    assert errors
+    assert graph._thread is None  # Следующий запрос построит граф заново
@@ -0,0 +1,49 @@
+class FakeTextLayout:
+    def __init__(self, spans):
+        self.spans = [("x", None)] * spans
+
+    def __len__(self):
+        return len(self.spans)
+
+
+class FakeLinkLayer:
+    def __init__(self, links=0):
+        self.links = [{}] * links
+
+
+def put(cache, owner, page_num, spans=0):
+    cache.put(owner, page_num, FakeTextLayout(spans), FakeLinkLayer())
+
+
+def test_get_returns_layers_of_owner(app):
+    cache = app.PageLayerCache(1)
+    tab_a, tab_b = object(), object()
+    put(cache, tab_a, 0)
+
+    assert cache.get(tab_a, 0) is not None
+    assert cache.get(tab_b, 0) is None
+
+
+def test_budget_is_shared_and_evicts_least_recently_used(app):
+    cache = app.PageLayerCache(1)  # ~3400 спанов
+    tab_a, tab_b = object(), object()
+    put(cache, tab_a, 0, spans=1500)
+    put(cache, tab_b, 0, spans=1500)
+    cache.get(tab_a, 0)
+    put(cache, tab_b, 1, spans=1500)
+
+    assert cache.get(tab_a, 0) is not None
+    assert cache.get(tab_b, 0) is None
+    assert cache.size_bytes <= cache.budget_bytes
+
+
+def test_drop_removes_only_closed_tab(app):
+    cache = app.PageLayerCache(1)
+    tab_a, tab_b = object(), object()
+    put(cache, tab_a, 0)
+    put(cache, tab_a, 1)
+    put(cache, tab_b, 0)
+    cache.drop(tab_a)
+
+    assert len(cache) == 1
+    assert cache.get(tab_b, 0) is not None
@@ -0,0 +1,87 @@
+from contextlib import contextmanager
+
+import fitz
+import pytest
+
+
+@contextmanager
+def make_service(app, render_pool, **kwargs):
+    # Пока тест держит условие очереди, рабочие потоки задания не разбирают
+    service = app.PageRenderService(render_pool, "/nonexistent/file.pdf", **kwargs)
+    try:
+        with service._cond:
+            yield service
+    finally:
+        service.shutdown(wait=True)
+
+
+def test_tile_mode_prefetches_neighbours_at_neighbor_zoom(app, render_pool):
+    with make_service(app, render_pool, workers=1, prefetch=2, neighbor_zoom=0.5) as service:
+        service.request(5, 3.0, 0, 20, tiles=[(0, 0), (1, 0)], preview_zoom=None)
+
+        tiles = [job for job in service._jobs if len(job) == 5]
+        pages = [job for job in service._jobs if len(job) == 3]
+        assert tiles == [(5, 3.0, 0, 0, 0), (5, 3.0, 0, 1, 0)]
+        assert pages and all(zoom == 0.5 for _, zoom, _ in pages)
+        assert 5 not in [page for page, _, _ in pages]
+
+
+def test_tile_mode_keeps_preview_of_current_page_first(app, render_pool):
+    with make_service(app, render_pool, workers=1, prefetch=1, neighbor_zoom=0.5) as service:
+        service.request(0, 3.0, 90, 10, tiles=[(0, 0)], preview_zoom=0.5)
+
+        assert service._jobs[0] == (0, 0.5, 90)
+        assert service._jobs[1] == (0, 3.0, 90, 0, 0)
+        assert service._jobs[2:] == [(1, 0.5, 90)]
+
+
+def test_page_mode_prefetches_neighbours_at_page_zoom(app, render_pool):
+    with make_service(app, render_pool, workers=1, prefetch=1) as service:
+        service.request(3, 1.5, 0, 10)
+
+        assert service._jobs == [(3, 1.5, 0), (4, 1.5, 0), (2, 1.5, 0)]
+
+
+def test_skip_filters_cached_neighbours(app, render_pool):
+    with make_service(app, render_pool, workers=1, prefetch=2, neighbor_zoom=0.5) as service:
+        cached = {(6, 0.5, 0)}
+        service.request(5, 3.0, 0, 20, tiles=[], skip=lambda key: key in cached)
+
+        assert (6, 0.5, 0) not in service._jobs
+        assert (4, 0.5, 0) in service._jobs
+
+
+@pytest.fixture(scope="module")
+def pdf_path(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("render") / "doc.pdf")
+    document = fitz.open()
+    page = document.new_page(width=200, height=100)
+    page.insert_text((20, 50), "hello")
+    page.insert_link({'kind': fitz.LINK_URI, 'from': fitz.Rect(10, 10, 60, 30), 'uri': "https://example.com"})
+    document.save(path)
+    document.close()
+    return path
+
+
+def test_pool_renders_pages_and_tiles_in_process(render_pool, pdf_path):
+    width, height, stride, samples = render_pool.render(pdf_path, 0, 2.0, 90)
+    assert (width, height) == (200, 400)
+    assert len(samples) == stride * height
+
+    width, height, _, _ = render_pool.render(pdf_path, 0, 2.0, 0, (0, 0), 128)
+    assert (width, height) == (128, 128)
+
+
+def test_pool_layers_build_page_layers(app, render_pool, pdf_path):
+    spans, links = render_pool.layers(pdf_path, 0)
+    text_layout = app.PageTextLayout(spans=spans)
+    link_layer = app.PageLinkLayer(links=links)
+
+    assert text_layout.text_in_rect(fitz.Rect(0, 0, 200, 100)) == "hello"
+    assert link_layer.link_at(fitz.Point(20, 20))['uri'] == "https://example.com"
+
+
+def test_pool_reports_job_errors(render_pool, pdf_path):
+    with pytest.raises(RuntimeError):
+        render_pool.render(pdf_path, 5, 1.0, 0)
+    assert render_pool.render(pdf_path, 0, 1.0, 0)[:2] == (200, 100)
@@ -0,0 +1,81 @@
+import os
+
+import fitz
+import pytest
+
+
+@pytest.fixture
+def index(app, tmp_path, monkeypatch):
+    path = str(tmp_path / "doc.pdf")
+    document = fitz.open()
+    for text in ("cat sat", "concatenate", "dog"):
+        document.new_page().insert_text((72, 72), text)
+    document.save(path)
+    document.close()
+
+    monkeypatch.setattr(app.SearchIndex, "index_directory", staticmethod(lambda: str(tmp_path / "index")))
+    index = app.SearchIndex(path, 3)
+    index._build()  # Синхронно, без фонового потока
+    assert index.is_complete
+    return index
+
+
+def test_whole_word_hits_come_with_rects(index):
+    hits, partial = index.lookup("cat")
+    assert sorted(hits) == [0]
+    assert partial == {1}
+
+
+def test_match_inside_word_is_left_to_caller(index):
+    hits, partial = index.lookup("cate")
+    assert hits == {}
+    assert partial == {1}
+
+
+def test_short_word_is_not_narrowed(index):
+    assert index.lookup("at") == (None, {0, 1, 2})
+
+
+def test_phrase_returns_candidate_pages(index):
+    assert index.lookup("cat sat") == (None, {0})
+
+
+def test_fingerprint_changes_with_mtime(app, index):
+    before = app.document_fingerprint(index.file_path)
+    stat = os.stat(index.file_path)
+    os.utime(index.file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert app.document_fingerprint(index.file_path) != before
+
+
+def test_rebuilt_document_replaces_its_old_index(app, index):
+    old_path = index.path
+    stat = os.stat(index.file_path)
+    os.utime(index.file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    rebuilt = app.SearchIndex(index.file_path, 3)
+    rebuilt._build()
+    assert rebuilt.path != old_path
+    assert os.listdir(os.path.dirname(old_path)) == [os.path.basename(rebuilt.path)]
+
+
+def test_repaired_copy_is_indexed_under_original(app, index, tmp_path):
+    copy_path = str(tmp_path / "repaired.pdf")
+    with open(index.file_path, 'rb') as source, open(copy_path, 'wb') as copy:
+        copy.write(source.read())
+
+    repaired = app.SearchIndex(copy_path, 3, key_path=index.file_path)
+    repaired._build()
+    assert repaired.path == index.path
+
+
+def test_evict_removes_least_recently_used(app, tmp_path):
+    directory = tmp_path / "evict"
+    directory.mkdir()
+    for age, name in enumerate(("new", "mid", "old")):
+        path = directory / f"{name}.sqlite"
+        path.write_bytes(bytes(1000))
+        (directory / f"{name}.sqlite-wal").write_bytes(bytes(500))
+        os.utime(path, (0, 1_000_000 - age * 1000))
+
+    app.SearchIndex.evict(str(directory), 3000, keep=str(directory / "old.sqlite"))
+    assert sorted(os.listdir(directory)) == ["new.sqlite", "new.sqlite-wal", "old.sqlite", "old.sqlite-wal"]
@@ -0,0 +1,42 @@
+import pytest
+
+
+def matches(app, text, query, **options):
+    return [m.group() for m in app.compile_search_pattern(query, **options).finditer(text)]
+
+
+def test_fold_diacritics(app):
+    assert app.fold_diacritics("café naïve") == "cafe naive"
+    assert app.fold_diacritics("Ёлка") == "Елка"
+    assert app.fold_diacritics("plain") == "plain"
+
+
+def test_ignore_diacritics_matches_folded_text(app):
+    text = app.fold_diacritics("Le café est fermé")
+    assert matches(app, text, "cafe", ignore_diacritics=True) == ["cafe"]
+    assert matches(app, text, "fermé", ignore_diacritics=True) == ["ferme"]
+
+
+def test_case_sensitivity(app):
+    text = "Python python PYTHON"
+    assert matches(app, text, "python") == ["Python", "python", "PYTHON"]
+    assert matches(app, text, "python", case_sensitive=True) == ["python"]
+
+
+def test_whole_word_skips_matches_inside_words(app):
+    text = "cat concat cats cat."
+    assert matches(app, text, "cat", whole_word=True) == ["cat", "cat"]
+
+
+@pytest.mark.parametrize("query, text, expected", [
+    ("C++", "Written in C++, not C.", ["C++"]),
+    ("#include", "#include <stdio.h>", ["#include"]),
+    (".NET", "Runs on .NET and .NETCore", [".NET"]),
+])
+def test_whole_word_with_non_word_edges(app, query, text, expected):
+    assert matches(app, text, query, whole_word=True) == expected
+
+
+def test_regex_errors_are_raised(app):
+    with pytest.raises(app.re.error):
+        app.compile_search_pattern("(", regex=True)
@@ -0,0 +1,38 @@
+import time
+
+import fitz
+import pytest
+
+
+@pytest.fixture
+def pdf_path(tmp_path):
+    path = str(tmp_path / "doc.pdf")
+    document = fitz.open()
+    for text in ("cat", "dog", "cat and cat"):
+        document.new_page().insert_text((72, 72), text)
+    document.save(path)
+    document.close()
+    return path
+
+
+def test_shared_pool_searches_and_closes_when_idle(app, pdf_path):
+    pool = app.SharedProcessPool(2, idle_timeout=0.1)
+    pool.acquire()
+    found = pool.submit(app.search_pages_in_process, pdf_path, "cat", [0, 1, 2]).result(60)
+    assert [page for page, _ in found] == [0, 2, 2]
+
+    pool.release()
+    time.sleep(0.5)
+    assert pool._executor is None
+
+
+def test_shared_pool_stays_up_while_in_use(app, pdf_path):
+    pool = app.SharedProcessPool(2, idle_timeout=0.1)
+    pool.acquire()
+    pool.acquire()
+    pool.submit(app.search_pages_in_process, pdf_path, "dog", [1]).result(60)
+    pool.release()
+    time.sleep(0.3)
+    assert pool._executor is not None
+    pool.release()
+    pool.shutdown()
@@ -0,0 +1,40 @@
+import queue
+import threading
+
+
+def test_tidy_joins_hyphenated_words_and_whitespace(app):
+    assert app.tidy_tts_text("инфор-\nмация  и\nтекст ") == "информация и текст"
+
+
+def test_tidy_keeps_literal_language_tags(app):
+    assert app.tidy_tts_text("see [lang en] here") == "see [lang en] here"
+
+
+def test_clean_splits_text_by_language_tags(app):
+    assert app.clean_tts_text("Привет [lang en]Hello\nworld") == [("Привет", None), ("Hello world", "en")]
+
+
+def test_langdetect_is_loaded_once_across_threads(app):
+    detector = app.LanguageDetector()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(detector.langdetect())) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(set(results)) == 1
+    assert detector.detect("Der schnelle braune Fuchs springt über den faulen Hund") == "de"
+
+
+def test_producer_stops_on_its_own_session_event(app):
+    controller = app.TTSController(lambda page_num: "[lang ru]Текст страницы.", 10)
+    page_queue, stop_event = queue.Queue(maxsize=1), threading.Event()
+    producer = threading.Thread(target=controller._produce_pages, args=(page_queue, stop_event))
+    producer.start()
+    page_queue.get(timeout=5)  # Очередь снова заполнится, и производитель будет ждать места
+
+    controller.stop_event = threading.Event()  # Следующий сеанс чтения
+    stop_event.set()
+    producer.join(5)
+    assert not producer.is_alive()